@@ -0,0 +1,37 @@
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Katalog so'rovlari rejasini tekshirish")
+    parser.add_argument("--db", default="bench.db", help="SQLite fayl yo'li")
+    args = parser.parse_args()
+    os.environ["ECOMMERCE_DATABASE_URL"] = f"sqlite:///{os.path.abspath(args.db)}"
+
+    import database
+    from services.catalog_service import CatalogService
+
+    database.init_db()
+
+    with database.session_scope() as session:
+        regressions = CatalogService(session).plan_regressions()
+
+    for regression in regressions:
+        if regression["full_scan"]:
+            print(f"To'liq skan: {regression['query']}")
+        else:
+            print(f"Chegaralanmagan indeks skani: {regression['query']}")
+        for detail in regression["plan"]:
+            print(f"  {detail}")
+
+    if regressions:
+        sys.exit(1)
+    print("Barcha katalog so'rovlari indeksdan chegaralangan holda foydalanadi")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import argparse
+import json
+import sys
+
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "queries_per_call")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ikki benchmark natijasini solishtirish")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)["results"]
+    with open(args.candidate, encoding="utf-8") as candidate_file:
+        candidate = json.load(candidate_file)["results"]
+
+    regressions = 0
+    for name in sorted(set(baseline) & set(candidate)):
+        for metric in METRICS:
+            old = baseline[name][metric]
+            new = candidate[name][metric]
+            change = (new - old) / old if old else 0.0
+            flag = ""
+            if change > args.threshold:
+                flag = "  <-- REGRESSION"
+                regressions += 1
+            print(f"{name:20s} {metric:17s} {old:>10.3f} -> {new:>10.3f} ({change:+.1%}){flag}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
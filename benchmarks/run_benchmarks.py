@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="E-commerce servis benchmarklari")
+    parser.add_argument("--scale", default="small", help="tiny, small, medium, large")
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--products", type=int)
+    parser.add_argument("--orders", type=int)
+    parser.add_argument("--db", default="bench.db", help="SQLite fayl yo'li")
+    parser.add_argument("--reseed", action="store_true", help="Bazani qaytadan yaratish")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--full-scan-iterations", type=int, default=3)
+    parser.add_argument("--only", nargs="*", help="Faqat shu benchmarklar")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_results.json")
+    return parser.parse_args()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def peak_rss_kb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage // 1024 if sys.platform == "darwin" else usage
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    args = parse_args()
+    os.environ["ECOMMERCE_DATABASE_URL"] = f"sqlite:///{os.path.abspath(args.db)}"
+
+    from sqlalchemy import event, func, select
+
+    import database
+    from benchmarks.seed import SCALES, seed_database
+    from models import Order, Product, User
+    from services.cart_service import CartService
+    from services.order_service import OrderService
+    from services.product_service import ProductService
+
+    scale = dict(SCALES[args.scale])
+    for key in ("users", "products", "orders"):
+        if getattr(args, key):
+            scale[key] = getattr(args, key)
+
+    if args.reseed and os.path.exists(args.db):
+        os.remove(args.db)
+
+    seeding = None
+    if not os.path.exists(args.db):
+        started = time.perf_counter()
+        counts = seed_database(database.DATABASE_URL, seed=args.seed, **scale)
+        seeding = {**counts, "seconds": round(time.perf_counter() - started, 2)}
+
+    database.init_db()
+
+    statements = [0]
+    for counted_engine in {database.engine, database.read_engine}:
+        event.listen(
+            counted_engine,
+            "before_cursor_execute",
+            lambda *_: statements.__setitem__(0, statements[0] + 1),
+        )
+
+    session = database.ScopedSession
+    products = ProductService(session)
+    carts = CartService(session)
+    orders = OrderService(session)
+    rng = random.Random(args.seed)
+
+    with database.session_scope() as scope:
+        max_user = scope.scalar(select(func.max(User.id))) or 1
+        max_product = scope.scalar(select(func.max(Product.id))) or 1
+        max_order = scope.scalar(select(func.max(Order.id))) or 1
+
+    def add_to_cart():
+        carts.add_to_cart(rng.randint(1, max_user), rng.randint(1, max_product), 1)
+
+    def create_order():
+        user_id = rng.randint(1, max_user)
+        carts.add_to_cart(user_id, rng.randint(1, max_product), 1)
+        return lambda: orders.create_order(user_id)
+
+    def cancel_order():
+        orders.cancel_order(rng.randint(1, max_order))
+
+    def search_products():
+        word = rng.choice(["phone", "lap", "shirt", "lamp", "chair", "book"])
+        products.search_products(word, ranked=True, limit=20)
+
+    benchmarks = {
+        "search_products": (search_products, False),
+        "get_products_page": (lambda: products.get_products_page(None, 20), False),
+        "get_all_products": (products.get_all_products, True),
+        "add_to_cart": (add_to_cart, False),
+        "create_order": (create_order, False),
+        "cancel_order": (cancel_order, False),
+        "get_revenue": (orders.get_revenue, False),
+        "get_order_details": (
+            lambda: orders.get_order_details(rng.randint(1, max_order)),
+            False,
+        ),
+    }
+
+    results = {}
+    for name, (call, full_scan) in benchmarks.items():
+        if args.only and name not in args.only:
+            continue
+
+        iterations = args.full_scan_iterations if full_scan else args.iterations
+        latencies = []
+        queries = 0
+
+        for _ in range(iterations):
+            with database.session_scope():
+                prepared = call() if name == "create_order" else None
+                measured = prepared or call
+                before = statements[0]
+                started = time.perf_counter()
+                measured()
+                latencies.append((time.perf_counter() - started) * 1000)
+                queries += statements[0] - before
+
+        results[name] = {
+            "iterations": iterations,
+            "mean_ms": round(sum(latencies) / iterations, 3),
+            "p50_ms": round(percentile(latencies, 0.50), 3),
+            "p95_ms": round(percentile(latencies, 0.95), 3),
+            "p99_ms": round(percentile(latencies, 0.99), 3),
+            "queries_per_call": round(queries / iterations, 2),
+            "peak_rss_kb": peak_rss_kb(),
+        }
+        print(f"{name:20s} p50={results[name]['p50_ms']:>9.3f}ms "
+              f"p99={results[name]['p99_ms']:>9.3f}ms "
+              f"q/call={results[name]['queries_per_call']}")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "scale": scale,
+            "seeding": seeding,
+            "iterations": args.iterations,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(report, output, indent=2)
+
+    print(f"Natijalar: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from database import Base, create_configured_engine
+from migrations import backfill_order_item_snapshots, ensure_order_summaries, run_migrations
+from models import Cart, Category, Order, OrderItem, Product, User
+from services.report_service import rebuild_rollups
+from utils.security import hash_password
+
+
+SCALES = {
+    "tiny": {"users": 200, "products": 2_000, "orders": 2_000},
+    "small": {"users": 1_000, "products": 10_000, "orders": 10_000},
+    "medium": {"users": 50_000, "products": 1_000_000, "orders": 1_000_000},
+    "large": {"users": 200_000, "products": 10_000_000, "orders": 10_000_000},
+}
+
+CATEGORIES = ["Electronics", "Books", "Clothing", "Home", "Garden", "Toys", "Sports", "Beauty"]
+WORDS = ["phone", "laptop", "shirt", "lamp", "chair", "ball", "book", "cream", "watch", "shoe"]
+STATUSES = ["pending", "completed", "completed", "cancelled"]
+BATCH_SIZE = 10_000
+
+
+def _batches(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _bulk_insert(connection, model, rows):
+    for batch in _batches(rows):
+        connection.execute(insert(model.__table__), batch)
+
+
+def seed_database(url: str, users: int, products: int, orders: int, seed: int = 42) -> dict:
+    rng = random.Random(seed)
+    engine = create_configured_engine(url, profile="bulk_load")
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+    password = hash_password("pass")
+    start = datetime(2024, 1, 1)
+    prices = {}
+
+    with engine.begin() as connection:
+        _bulk_insert(
+            connection,
+            User,
+            (
+                {
+                    "id": user_id,
+                    "username": f"user{user_id}",
+                    "password": password,
+                    "first_name": "Bench",
+                    "last_name": "User",
+                }
+                for user_id in range(1, users + 1)
+            ),
+        )
+        _bulk_insert(
+            connection,
+            Cart,
+            ({"id": user_id, "user_id": user_id} for user_id in range(1, users + 1)),
+        )
+
+        _bulk_insert(
+            connection,
+            Category,
+            (
+                {"id": category_id, "name": name}
+                for category_id, name in enumerate(CATEGORIES, 1)
+            ),
+        )
+
+        def product_rows():
+            for product_id in range(1, products + 1):
+                price = round(rng.uniform(1, 1000), 2)
+                if product_id <= 100_000:
+                    prices[product_id] = price
+                category = rng.choice(CATEGORIES)
+                yield {
+                    "id": product_id,
+                    "user_id": rng.randint(1, users),
+                    "name": f"{rng.choice(WORDS).title()} {product_id}",
+                    "category": category,
+                    "category_id": CATEGORIES.index(category) + 1,
+                    "price": price,
+                    "sale": rng.choice([0, 0, 0, 5, 10]),
+                    "stock": rng.randint(0, 500),
+                    "description": " ".join(rng.choices(WORDS, k=6)),
+                    "is_active": rng.random() > 0.05,
+                }
+
+        _bulk_insert(connection, Product, product_rows())
+
+        item_id = 0
+
+        def order_rows(items):
+            nonlocal item_id
+            for order_id in range(1, orders + 1):
+                total = 0.0
+                for _ in range(rng.randint(1, 3)):
+                    item_id += 1
+                    product_id = rng.randint(1, products)
+                    price = prices.get(product_id) or 100.0
+                    quantity = rng.randint(1, 4)
+                    total += price * quantity
+                    items.append(
+                        {
+                            "id": item_id,
+                            "order_id": order_id,
+                            "product_id": product_id,
+                            "quantity": quantity,
+                            "price_at_purchase": price,
+                            "sale_at_purchase": 0,
+                        }
+                    )
+                yield {
+                    "id": order_id,
+                    "user_id": rng.randint(1, users),
+                    "total_price": total,
+                    "status": rng.choice(STATUSES),
+                    "created_at": start + timedelta(minutes=rng.randint(0, 525_600)),
+                }
+
+        pending_items = []
+        for batch in _batches(order_rows(pending_items)):
+            connection.execute(insert(Order.__table__), batch)
+            connection.execute(insert(OrderItem.__table__), pending_items)
+            pending_items.clear()
+
+        backfill_order_item_snapshots(connection)
+        rebuild_rollups(connection)
+        ensure_order_summaries(connection)
+
+    engine.dispose()
+    return {"users": users, "products": products, "orders": orders, "order_items": item_id}
@@ -1,31 +1,402 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 
-DATABASE_URL = "sqlite:///ecommerce.db"
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, declarative_base, scoped_session, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
 
-engine = create_engine(
+from utils.read_routing import EVENTUAL, current_read_route
+
+DEFAULT_DATABASE_URL = "sqlite:///ecommerce.db"
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+DB_PROFILES = {
+    "oltp": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "foreign_keys": "ON",
+        "busy_timeout": 5000,
+        "cache_size": -64000,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    },
+    "bulk_load": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "foreign_keys": "OFF",
+        "busy_timeout": 30000,
+        "cache_size": -512000,
+        "mmap_size": 1073741824,
+        "temp_store": "MEMORY",
+    },
+    "read_only": {
+        "query_only": "ON",
+        "foreign_keys": "ON",
+        "busy_timeout": 5000,
+        "cache_size": -128000,
+        "mmap_size": 1073741824,
+        "temp_store": "MEMORY",
+    },
+}
+
+
+def load_settings() -> dict:
+    settings = {
+        "url": DEFAULT_DATABASE_URL,
+        "profile": "oltp",
+        "pragmas": {},
+        "pool_size": 5,
+        "max_overflow": 10,
+        "echo": False,
+        "read_replica_url": None,
+        "replica_refresh_interval": 5.0,
+    }
+
+    config_path = os.environ.get("ECOMMERCE_DB_CONFIG")
+    if config_path:
+        with open(config_path, encoding="utf-8") as config_file:
+            settings.update(json.load(config_file))
+
+    env_overrides = {
+        "url": os.environ.get("ECOMMERCE_DATABASE_URL"),
+        "profile": os.environ.get("ECOMMERCE_DB_PROFILE"),
+        "pool_size": os.environ.get("ECOMMERCE_DB_POOL_SIZE"),
+        "max_overflow": os.environ.get("ECOMMERCE_DB_MAX_OVERFLOW"),
+        "echo": os.environ.get("ECOMMERCE_DB_ECHO"),
+        "read_replica_url": os.environ.get("ECOMMERCE_READ_REPLICA_URL"),
+        "replica_refresh_interval": os.environ.get("ECOMMERCE_REPLICA_REFRESH_INTERVAL"),
+    }
+    for key, value in env_overrides.items():
+        if value is not None:
+            settings[key] = value
+
+    settings["pool_size"] = int(settings["pool_size"])
+    settings["max_overflow"] = int(settings["max_overflow"])
+    settings["replica_refresh_interval"] = float(settings["replica_refresh_interval"])
+    if isinstance(settings["echo"], str):
+        settings["echo"] = settings["echo"].lower() in ("1", "true", "yes")
+
+    if settings["profile"] not in DB_PROFILES:
+        raise ValueError(
+            f"Noma'lum DB profile: '{settings['profile']}'. "
+            f"Mumkin: {', '.join(DB_PROFILES)}"
+        )
+
+    return settings
+
+
+def resolve_pragmas(profile: str, overrides: dict | None = None) -> dict:
+    pragmas = dict(DB_PROFILES[profile])
+    pragmas.update(overrides or {})
+    return pragmas
+
+
+def create_configured_engine(
+    url: str,
+    profile: str = "oltp",
+    pragmas: dict | None = None,
+    pool_size: int = 5,
+    max_overflow: int = 10,
+    echo: bool = False,
+):
+    url = make_url(url)
+    options = {"echo": echo, "future": True}
+
+    is_sqlite = url.get_backend_name() == "sqlite"
+    is_memory = is_sqlite and url.database in (None, "", ":memory:")
+
+    if not is_memory:
+        options["pool_size"] = pool_size
+        options["max_overflow"] = max_overflow
+        options["pool_pre_ping"] = not is_sqlite
+
+    new_engine = create_engine(url, **options)
+
+    if is_sqlite:
+        install_pragmas(new_engine, profile, pragmas)
+
+    return new_engine
+
+
+def install_pragmas(sync_engine, profile: str, pragmas: dict | None = None):
+    connect_pragmas = resolve_pragmas(profile, pragmas)
+
+    @event.listens_for(sync_engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in connect_pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+
+def create_configured_async_engine(
+    url: str,
+    profile: str = "oltp",
+    pragmas: dict | None = None,
+    echo: bool = False,
+):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = make_url(url)
+    if url.drivername in ("sqlite", "sqlite+pysqlite"):
+        url = url.set(drivername="sqlite+aiosqlite")
+
+    new_engine = create_async_engine(url, echo=echo)
+
+    if url.get_backend_name() == "sqlite":
+        install_pragmas(new_engine.sync_engine, profile, pragmas)
+
+    return new_engine
+
+
+class ReadReplica:
+
+    def __init__(self, primary_engine, replica_engine, interval: float = 5.0):
+        self.primary_engine = primary_engine
+        self.replica_engine = replica_engine
+        self.interval = interval
+        self.path = replica_engine.url.database
+        self.refreshed_at = None
+        self.last_write_at = float("-inf")
+        self.refreshes = 0
+        self.failures = 0
+        self._open_writes = 0
+        self._lock = threading.Lock()
+        self._writes_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        event.listen(primary_engine, "after_cursor_execute", self._track_write)
+        event.listen(primary_engine.pool, "checkin", self._track_checkin)
+
+    def _track_write(self, conn, cursor, statement, parameters, context, executemany):
+        is_write = context is not None and (
+            context.isinsert or context.isupdate or context.isdelete
+        )
+        if not is_write and not statement.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+            return
+        if conn.info.get("replica_pending_write"):
+            return
+
+        conn.info["replica_pending_write"] = True
+        with self._writes_lock:
+            self._open_writes += 1
+
+    def _track_checkin(self, dbapi_connection, connection_record):
+        if connection_record is None or not connection_record.info.pop(
+            "replica_pending_write", False
+        ):
+            return
+
+        with self._writes_lock:
+            self._open_writes -= 1
+            self.last_write_at = time.monotonic()
+
+    def refresh(self):
+        with self._lock:
+            started = time.monotonic()
+            source = self.primary_engine.raw_connection()
+            target = sqlite3.connect(self.path, timeout=30)
+            try:
+                source.driver_connection.backup(target)
+            finally:
+                target.close()
+                source.close()
+
+            self.refreshed_at = started
+            self.refreshes += 1
+
+    def is_ready(self) -> bool:
+        return self.refreshed_at is not None
+
+    def is_fresh(self) -> bool:
+        with self._writes_lock:
+            return (
+                self.is_ready()
+                and self._open_writes == 0
+                and self.refreshed_at > self.last_write_at
+            )
+
+    def lag(self) -> float:
+        if not self.is_ready():
+            return float("inf")
+        return time.monotonic() - self.refreshed_at
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="read-replica-refresh", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        if not self.is_ready():
+            try:
+                self.refresh()
+            except sqlite3.Error:
+                self.failures += 1
+
+        while not self._stopped.wait(self.interval):
+            try:
+                self.refresh()
+            except sqlite3.Error:
+                self.failures += 1
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "lag_seconds": self.lag(),
+            "fresh": self.is_fresh(),
+        }
+
+
+class RoutingSession(Session):
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        route = current_read_route()
+
+        if (
+            route is None
+            or replica is None
+            or self._flushing
+            or isinstance(clause, UpdateBase)
+            or not replica.is_ready()
+        ):
+            return engine
+
+        if route == EVENTUAL or replica.is_fresh():
+            return read_engine
+
+        return engine
+
+
+settings = load_settings()
+DATABASE_URL = settings["url"]
+DB_PROFILE = settings["profile"]
+READ_REPLICA_URL = settings["read_replica_url"]
+
+engine = create_configured_engine(
     DATABASE_URL,
-    echo=False,
-    future=True,
+    profile=DB_PROFILE,
+    pragmas=settings["pragmas"],
+    pool_size=settings["pool_size"],
+    max_overflow=settings["max_overflow"],
+    echo=settings["echo"],
 )
 
+if READ_REPLICA_URL:
+    read_engine = create_configured_engine(
+        READ_REPLICA_URL,
+        profile="read_only",
+        pool_size=settings["pool_size"],
+        max_overflow=settings["max_overflow"],
+        echo=settings["echo"],
+    )
+    replica = ReadReplica(engine, read_engine, settings["replica_refresh_interval"])
+else:
+    read_engine = engine
+    replica = None
+
 SessionLocal = sessionmaker(
     bind=engine,
+    class_=RoutingSession,
     autoflush=False,
     autocommit=False,
 )
 
+_scope_key = ContextVar("session_scope_key", default=None)
+
+
+def current_scope_key():
+    key = _scope_key.get()
+    return key if key is not None else threading.get_ident()
+
+
+ScopedSession = scoped_session(SessionLocal, scopefunc=current_scope_key)
+
 Base = declarative_base()
 
 
+_async_sessionmaker = None
+
+
 def get_session():
     return SessionLocal()
 
 
+def get_async_session():
+    global _async_sessionmaker
+
+    if _async_sessionmaker is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        async_engine = create_configured_async_engine(
+            DATABASE_URL,
+            profile=DB_PROFILE,
+            pragmas=settings["pragmas"],
+            echo=settings["echo"],
+        )
+        _async_sessionmaker = async_sessionmaker(
+            bind=async_engine,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+
+    return _async_sessionmaker()
+
+
+@contextmanager
+def session_scope():
+    token = _scope_key.set(object())
+    try:
+        yield ScopedSession()
+    except Exception:
+        ScopedSession.rollback()
+        raise
+    finally:
+        ScopedSession.remove()
+        _scope_key.reset(token)
+
+
 def close_session(session):
-    session.close()
+    if session is ScopedSession:
+        session.remove()
+    else:
+        session.close()
+
+
+async def close_async_session(session):
+    await session.close()
+
+
+def init_db(force: bool = False):
+    from migrations import SCHEMA_VERSION, read_schema_version, run_migrations
+
+    if DB_PROFILE == "read_only":
+        return
+
+    if force or read_schema_version(engine) < SCHEMA_VERSION:
+        import models
 
+        Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
 
-def init_db():
-    import models
-    Base.metadata.create_all(bind=engine)
+    if replica is not None and read_schema_version(read_engine) < SCHEMA_VERSION:
+        replica.refresh()
@@ -1,9 +1,145 @@
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
-from rich.box import ROUNDED
+import os
+import re
+import sys
+from itertools import islice
+from typing import Callable, Iterable, Optional
+
+OUTPUT_MODES = ("rich", "plain")
+RENDER_PAGE_SIZE = 50
+
+PRODUCT_COLUMNS = [
+    ("ID", {"style": "bold yellow", "width": 5}),
+    ("Nomi", {"style": "bold cyan"}),
+    ("Kategoriya", {"style": "magenta"}),
+    ("Narx", {"style": "bold green"}),
+    ("Stock", {"style": "blue"}),
+]
+
+CART_COLUMNS = [
+    ("#", {"style": "bold yellow", "width": 3}),
+    ("Mahsulot", {"style": "bold cyan"}),
+    ("Miqdor", {"style": "magenta", "justify": "center"}),
+    ("Narx", {"style": "bold green"}),
+    ("Jami", {"style": "bold green"}),
+]
+
+ORDER_COLUMNS = [
+    ("ID", {"style": "bold yellow"}),
+    ("Status", {"style": "magenta"}),
+    ("Jami", {"style": "bold green"}),
+    ("Mahsulot", {"style": "blue"}),
+    ("Tarkib", {"style": "cyan"}),
+    ("Sana", {"style": "yellow"}),
+]
+
+_MARKUP = re.compile(r"\[/?[a-z_ ]*\]")
+
+_output_mode = os.environ.get("ECOMMERCE_CLI_OUTPUT", "rich").lower()
+_console = None
+
+
+def set_output_mode(mode: str):
+    global _output_mode
+
+    if mode not in OUTPUT_MODES:
+        raise ValueError(
+            f"Noma'lum chiqish rejimi: '{mode}'. Mumkin: {', '.join(OUTPUT_MODES)}"
+        )
+    _output_mode = mode
+
+
+def is_plain() -> bool:
+    return _output_mode == "plain"
+
+
+def get_console():
+    global _console
+
+    if _console is None:
+        from rich.console import Console
+
+        _console = Console()
+    return _console
+
+
+def strip_markup(text: str) -> str:
+    return _MARKUP.sub("", text)
+
+
+def show_panel(message: str, title: str, border_style: str, padding=(0, 1)):
+    if is_plain():
+        sys.stdout.write(f"[{strip_markup(title).strip()}] {strip_markup(message).strip()}\n")
+        return
+
+    from rich.box import ROUNDED
+    from rich.panel import Panel
+
+    get_console().print(
+        Panel(
+            message,
+            title=title,
+            box=ROUNDED,
+            border_style=border_style,
+            padding=padding,
+        )
+    )
+
+
+def render_table(
+    title: str,
+    columns: list,
+    rows: Iterable[tuple],
+    footer: Optional[Callable[[], tuple]] = None,
+    page_size: int = RENDER_PAGE_SIZE,
+) -> int:
+    rows = iter(rows)
+
+    if is_plain():
+        return _render_plain(columns, rows, footer)
 
-console = Console()
+    from rich.box import ROUNDED
+    from rich.table import Table
+
+    console = get_console()
+    count = 0
+    chunk = list(islice(rows, page_size))
+
+    while chunk:
+        following = list(islice(rows, page_size)) if footer else []
+
+        table = Table(
+            title=title if count == 0 else None,
+            box=ROUNDED,
+            border_style="cyan",
+        )
+        for name, options in columns:
+            table.add_column(name, **options)
+        for row in chunk:
+            table.add_row(*row)
+        if footer and not following:
+            table.add_row(*footer())
+
+        console.print(table)
+        count += len(chunk)
+        chunk = following if footer else list(islice(rows, page_size))
+
+    return count
+
+
+def _render_plain(columns: list, rows, footer) -> int:
+    output = sys.stdout
+    count = 0
+
+    for row in rows:
+        if count == 0:
+            output.write("\t".join(name for name, _ in columns) + "\n")
+        output.write("\t".join(row) + "\n")
+        count += 1
+
+    if footer and count:
+        output.write("\t".join(footer()) + "\n")
+    output.flush()
+    return count
 
 
 def show_home_menu():
@@ -12,15 +148,7 @@ def show_home_menu():
 [bold cyan]2.[/] Kirish
 [bold cyan]0.[/] Chiqish
 """
-    console.print(
-        Panel(
-            menu_text,
-            title="[bold green] E-COMMERCE[/]",
-            box=ROUNDED,
-            border_style="bright_blue",
-            padding=(1, 2),
-        )
-    )
+    show_panel(menu_text, "[bold green] E-COMMERCE[/]", "bright_blue", padding=(1, 2))
 
 
 def show_user_menu(username: str):
@@ -38,151 +166,80 @@ def show_user_menu(username: str):
 
 Foydalanuvchi: [bold yellow]{username}[/]
 """
-    console.print(
-        Panel(
-            menu_text,
-            title="[bold green] USER MENU[/]",
-            box=ROUNDED,
-            border_style="bright_blue",
-            padding=(1, 2),
-        )
-    )
+    show_panel(menu_text, "[bold green] USER MENU[/]", "bright_blue", padding=(1, 2))
 
 
 def show_success(message: str):
-    console.print(
-        Panel(
-            message,
-            title="[bold green]✓ Muvaffaqiyat[/]",
-            box=ROUNDED,
-            border_style="bright_green",
-        )
-    )
+    show_panel(message, "[bold green]✓ Muvaffaqiyat[/]", "bright_green")
 
 
 def show_error(message: str):
-    console.print(
-        Panel(
-            message,
-            title="[bold red]✗ Xato[/]",
-            box=ROUNDED,
-            border_style="bright_red",
-        )
-    )
+    show_panel(message, "[bold red]✗ Xato[/]", "bright_red")
 
 
 def show_info(message: str):
-    console.print(
-        Panel(
-            message,
-            title="[bold cyan] Ma'lumot[/]",
-            box=ROUNDED,
-            border_style="bright_cyan",
-        )
-    )
+    show_panel(message, "[bold cyan] Ma'lumot[/]", "bright_cyan")
 
 
 def show_warning(message: str):
-    console.print(
-        Panel(
-            message,
-            title="[bold yellow] Ogohlantirish[/]",
-            box=ROUNDED,
-            border_style="bright_yellow",
-        )
-    )
+    show_panel(message, "[bold yellow] Ogohlantirish[/]", "bright_yellow")
 
 
-def show_products_table(products: list):
-    if not products:
-        show_info("Hech qanday mahsulot topilmadi")
-        return
-
-    table = Table(
-        title=" MAHSULOTLAR",
-        box=ROUNDED,
-        border_style="cyan",
+def product_row(product) -> tuple:
+    return (
+        str(product.id),
+        product.name,
+        product.category,
+        f"{product.price:,.0f}",
+        str(product.stock),
     )
 
-    table.add_column("ID", style="bold yellow", width=5)
-    table.add_column("Nomi", style="bold cyan")
-    table.add_column("Kategoriya", style="magenta")
-    table.add_column("Narx", style="bold green")
-    table.add_column("Stock", style="blue")
-
-    for product in products:
-        table.add_row(
-            str(product.id),
-            product.name,
-            product.category,
-            f"{product.price:,.0f}",
-            str(product.stock),
-        )
-
-    console.print(table)
 
+def order_row(order) -> tuple:
+    return (
+        str(order.id),
+        order.status,
+        f"{order.total_price:,.0f}",
+        str(order.items_count or 0),
+        order.summary or "",
+        order.created_at.strftime("%Y-%m-%d %H:%M"),
+    )
 
 
-def show_cart_table(cart_items: list):
-    if not cart_items:
-        show_info("Savat bo'sh")
-        return
+def show_products_table(products: Iterable):
+    shown = render_table(" MAHSULOTLAR", PRODUCT_COLUMNS, map(product_row, products))
+    if not shown:
+        show_info("Hech qanday mahsulot topilmadi")
 
-    table = Table(
-        title="🛒 SAVAT",
-        box=ROUNDED,
-        border_style="cyan",
-    )
 
-    table.add_column("#", style="bold yellow", width=3)
-    table.add_column("Mahsulot", style="bold cyan")
-    table.add_column("Miqdor", style="magenta", justify="center")
-    table.add_column("Narx", style="bold green")
-    table.add_column("Jami", style="bold green")
-
-    total = 0
-    for i, item in enumerate(cart_items, 1):
-        item_total = item.get_total_price()
-        total += item_total
-        table.add_row(
-            str(i),
-            item.product.name,
-            str(item.quantity),
-            f"{item.product.get_final_price():,.0f}",
-            f"{item_total:,.0f}",
-        )
+def show_cart_table(cart_lines: Iterable, total: Optional[float] = None):
+    running_total = 0.0
 
-    table.add_row("", "", "", "[bold]JAMI:[/]", f"[bold green]{total:,.0f}[/]")
-    console.print(table)
+    def rows():
+        nonlocal running_total
+        for index, line in enumerate(cart_lines, 1):
+            running_total += line.line_total
+            yield (
+                str(index),
+                line.name,
+                str(line.quantity),
+                f"{line.unit_price:,.0f}",
+                f"{line.line_total:,.0f}",
+            )
 
+    def footer():
+        value = running_total if total is None else total
+        return ("", "", "", "JAMI:", f"{value:,.0f}")
 
-def show_orders_table(orders: list):
-    if not orders:
-        show_info("Hech qanday buyurtma topilmadi")
-        return
+    shown = render_table("🛒 SAVAT", CART_COLUMNS, rows(), footer)
+    if not shown:
+        show_info("Savat bo'sh")
 
-    table = Table(
-        title=" BUYURTMALAR",
-        box=ROUNDED,
-        border_style="cyan",
-    )
 
-    table.add_column("ID", style="bold yellow")
-    table.add_column("Status", style="magenta")
-    table.add_column("Jami", style="bold green")
-    table.add_column("Mahsulot", style="blue")
-    table.add_column("Sana", style="yellow")
-
-    for order in orders:
-        table.add_row(
-            str(order.id),
-            order.status,
-            f"{order.total_price:,.0f}",
-            str(order.get_items_count()),
-            order.created_at.strftime("%Y-%m-%d %H:%M"),
-        )
-
-    console.print(table)
+def show_orders_table(orders: Iterable):
+    shown = render_table(" BUYURTMALAR", ORDER_COLUMNS, map(order_row, orders))
+    if not shown:
+        show_info("Hech qanday buyurtma topilmadi")
 
 
 def show_order_details(order_details: dict):
@@ -203,12 +260,4 @@ def show_order_details(order_details: dict):
     for item in order_details["items"]:
         info += f"\n • {item['product_name']} x{item['quantity']} = {item['total']:,.0f}"
 
-    console.print(
-        Panel(
-            info,
-            title="[bold green] ORDER DETAILS[/]",
-            box=ROUNDED,
-            border_style="cyan",
-            padding=(1, 2),
-        )
-    )
+    show_panel(info, "[bold green] ORDER DETAILS[/]", "cyan", padding=(1, 2))
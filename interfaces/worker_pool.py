@@ -0,0 +1,55 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from database import ScopedSession, SessionLocal, session_scope
+from services.cart_service import CartService
+from services.catalog_service import CatalogService
+from services.category_service import CategoryService
+from services.inventory import aggregate_refresher
+from services.order_service import OrderService
+from services.product_service import ProductService
+from services.user_service import UserService
+
+
+class ShopWorkerPool:
+
+    def __init__(self, max_workers: int = 8):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="shop-worker"
+        )
+        self.services = {
+            "user": UserService,
+            "product": ProductService,
+            "category": CategoryService,
+            "catalog": CatalogService,
+            "cart": CartService,
+            "order": OrderService,
+        }
+        aggregate_refresher.start(SessionLocal)
+
+    def submit(self, service: str, method: str, *args, **kwargs) -> Future:
+        if service not in self.services:
+            raise ValueError(
+                f"Noma'lum servis: '{service}'. Mumkin: {', '.join(self.services)}"
+            )
+
+        service_class = self.services[service]
+        if method.startswith("_") or not callable(getattr(service_class, method, None)):
+            raise ValueError(f"'{service}' servisida '{method}' metodi yo'q")
+
+        return self.executor.submit(self._run, service_class, method, args, kwargs)
+
+    def run_many(self, calls: list) -> list:
+        futures = []
+        for service, method, *rest in calls:
+            args = rest[0] if rest else ()
+            kwargs = rest[1] if len(rest) > 1 else {}
+            futures.append(self.submit(service, method, *args, **kwargs))
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait)
+        aggregate_refresher.stop()
+
+    def _run(self, service_class, method, args, kwargs):
+        with session_scope():
+            return getattr(service_class(ScopedSession), method)(*args, **kwargs)
@@ -3,13 +3,15 @@ import sys
 
 sys.path.insert(0, os.path.dirname(__file__))
 
-from database import close_session, get_session, init_db
-from interfaces.cli import show_error, show_success
-from main_menu import MenuHandler
-from services.cart_service import CartService
-from services.order_service import OrderService
-from services.product_service import ProductService
-from services.user_service import UserService
+from database import (
+    ScopedSession,
+    SessionLocal,
+    close_session,
+    engine,
+    init_db,
+    read_engine,
+    replica,
+)
 
 
 class EcommerceApp:
@@ -17,16 +19,42 @@ class EcommerceApp:
     def __init__(self):
         try:
             init_db()
-            self.session = get_session()
+            if replica is not None:
+                replica.start()
+            self.session = ScopedSession
+
+            from main_menu import MenuHandler
+            from services.cart_service import CartService
+            from services.inventory import aggregate_refresher
+            from services.order_service import OrderService
+            from services.product_service import ProductService
+            from services.user_service import UserService
+            from utils.sql_profiler import profiler_from_env
 
             self.user_service = UserService(self.session)
             self.product_service = ProductService(self.session)
             self.cart_service = CartService(self.session)
             self.order_service = OrderService(self.session)
+            aggregate_refresher.start(SessionLocal)
+
+            self.profiler = profiler_from_env()
+            if self.profiler:
+                self.profiler.attach(engine)
+                if read_engine is not engine:
+                    self.profiler.attach(read_engine)
+                for service in (
+                    self.user_service,
+                    self.product_service,
+                    self.cart_service,
+                    self.order_service,
+                ):
+                    self.profiler.instrument(service)
 
             self.menu = MenuHandler(self)
 
         except Exception as e:
+            from interfaces.cli import show_error
+
             show_error(f"Initialization xatosi: {str(e)}")
             sys.exit(1)
 
@@ -34,16 +62,40 @@ class EcommerceApp:
         self.menu.show_main_menu()
 
     def shutdown(self):
+        from interfaces.cli import show_error, show_success
+
         try:
+            from services.inventory import aggregate_refresher
+
+            aggregate_refresher.stop()
+            if replica is not None:
+                replica.stop()
             close_session(self.session)
+            self.dump_profile()
             show_success("Dastur yopildi. Xayr!")
         except Exception as e:
             show_error(f"Shutdown xatosi: {str(e)}")
         finally:
             sys.exit(0)
 
+    def dump_profile(self):
+        if not self.profiler:
+            return
+
+        from interfaces.cli import show_info
+
+        output_path = os.environ.get("ECOMMERCE_SQL_PROFILE_OUTPUT")
+        if output_path:
+            self.profiler.dump(output_path)
+        show_info(self.profiler.format_report())
+
 
 def main():
+    if "--plain" in sys.argv[1:]:
+        from interfaces.cli import set_output_mode
+
+        set_output_mode("plain")
+
     app = EcommerceApp()
 
     try:
@@ -52,6 +104,8 @@ def main():
         print()
         app.shutdown()
     except Exception as e:
+        from interfaces.cli import show_error
+
         show_error(f"Dasturda xato: {str(e)}")
         app.shutdown()
 
@@ -1,4 +1,7 @@
+from database import session_scope
+from utils.pagination import iter_pages
 from interfaces.cli import (
+    is_plain,
     show_home_menu,
     show_user_menu,
     show_products_table,
@@ -11,6 +14,9 @@ from interfaces.cli import (
 )
 
 
+PAGE_SIZE = 20
+
+
 class MenuHandler:
 
     def __init__(self, app):
@@ -22,7 +28,8 @@ class MenuHandler:
             choice = input("\n→ Tanlovingizni kiriting: ").strip()
 
             if choice == "1":
-                self.handle_register()
+                with session_scope():
+                    self.handle_register()
             elif choice == "2":
                 self.handle_login()
             elif choice == "0":
@@ -52,7 +59,8 @@ class MenuHandler:
         username = input("Foydalanuvchi nomi: ").strip()
         password = input("Parol: ").strip()
 
-        success, message = self.app.user_service.login(username, password)
+        with session_scope():
+            success, message = self.app.user_service.login(username, password)
 
         if success:
             show_success(message)
@@ -68,44 +76,81 @@ class MenuHandler:
             show_user_menu(username)
             choice = input("\n→ Tanlovingizni kiriting: ").strip()
 
-            if choice == "1":
-                self.view_all_products()
-            elif choice == "2":
-                self.add_to_cart()
-            elif choice == "3":
-                self.view_cart()
-            elif choice == "4":
-                self.remove_from_cart()
-            elif choice == "5":
-                self.create_order()
-            elif choice == "6":
-                self.view_my_orders()
-            elif choice == "7":
-                self.add_product(user_id)   
-            elif choice == "8":
-                self.manage_my_products(user_id)  
-            elif choice == "0":
-                self.app.user_service.logout()
-                show_success("Chiqib ketdiniz")
-            else:
-                show_error("Noto'g'ri tanlov")
+            with session_scope():
+                if choice == "1":
+                    self.view_all_products()
+                elif choice == "2":
+                    self.add_to_cart()
+                elif choice == "3":
+                    self.view_cart()
+                elif choice == "4":
+                    self.remove_from_cart()
+                elif choice == "5":
+                    self.create_order()
+                elif choice == "6":
+                    self.view_my_orders()
+                elif choice == "7":
+                    self.add_product(user_id)   
+                elif choice == "8":
+                    self.manage_my_products(user_id)  
+                elif choice == "0":
+                    self.app.user_service.logout()
+                    show_success("Chiqib ketdiniz")
+                else:
+                    show_error("Noto'g'ri tanlov")
+
+    def browse_pages(self, fetch_page, render) -> bool:
+        cursor = None
+        shown = False
+
+        while True:
+            rows, cursor = fetch_page(cursor)
+            if not rows:
+                return shown
+
+            render(rows)
+            shown = True
+
+            if not cursor:
+                return shown
+
+            choice = input("\n→ Keyingi sahifa uchun 'n', davom etish uchun Enter: ")
+            if choice.strip().lower() != "n":
+                return shown
 
     def view_all_products(self):
-        products = self.app.product_service.get_all_products()
-        if not products:
-            show_info("Hech qanday mahsulot yo'q")
+        fetch_page = lambda cursor: self.app.product_service.get_products_page(
+            cursor, PAGE_SIZE
+        )
+
+        if is_plain():
+            show_products_table(iter_pages(fetch_page))
             return
-        show_products_table(products)
+
+        shown = self.browse_pages(fetch_page, show_products_table)
+        if not shown:
+            show_info("Hech qanday mahsulot yo'q")
+
+    def browse_user_products(self, user_id: str) -> bool:
+        return self.browse_pages(
+            lambda cursor: self.app.product_service.get_user_products_page(
+                user_id, cursor, PAGE_SIZE
+            ),
+            show_products_table,
+        )
 
     def add_to_cart(self):
-        products = self.app.product_service.get_all_products()
+        shown = self.browse_pages(
+            lambda cursor: self.app.product_service.get_products_page(
+                cursor, PAGE_SIZE
+            ),
+            show_products_table,
+        )
 
-        if not products:
+        if not shown:
             show_error("Mahsulot yo'q")
             return
 
-        show_products_table(products)
-
         try:
             product_id = int(input("\nMahsulot ID: "))
             quantity = int(input("Miqdor: "))
@@ -124,18 +169,22 @@ class MenuHandler:
 
     def view_cart(self):
         user_id = self.app.user_service.logged_user.id
-        cart_items = self.app.cart_service.get_cart_items(user_id)
-        show_cart_table(cart_items)
+        totals = self.app.cart_service.get_cart_totals(user_id)
+        if not totals["items_count"]:
+            show_info("Savat bo'sh")
+            return
+
+        show_cart_table(self.app.cart_service.get_cart_lines(user_id), totals["total_price"])
 
     def remove_from_cart(self):
         user_id = self.app.user_service.logged_user.id
-        cart_items = self.app.cart_service.get_cart_items(user_id)
+        cart_lines = self.app.cart_service.get_cart_lines(user_id)
 
-        if not cart_items:
+        if not cart_lines:
             show_error("Savat bo'sh")
             return
 
-        show_cart_table(cart_items)
+        show_cart_table(cart_lines)
 
         try:
             product_id = int(input("\nO'chiriladigan mahsulot ID: "))
@@ -163,14 +212,17 @@ class MenuHandler:
 
     def view_my_orders(self):
         user_id = self.app.user_service.logged_user.id
-        orders = self.app.order_service.get_user_orders(user_id)
+        shown = self.browse_pages(
+            lambda cursor: self.app.order_service.get_user_orders_page(
+                user_id, cursor, PAGE_SIZE
+            ),
+            show_orders_table,
+        )
 
-        if not orders:
+        if not shown:
             show_info("Sizda hech qanday buyurtma yo'q")
             return
 
-        show_orders_table(orders)
-
         try:
             order_id = int(input("\nOrder ID (detallari uchun): "))
             order_details = self.app.order_service.get_order_details(order_id)
@@ -183,15 +235,11 @@ class MenuHandler:
 
     def manage_my_products(self, user_id: str):
         while True:
-            products = self.app.product_service.get_user_products(user_id)
-
             print("\n" + "=" * 60)
             print("📦 MENING MAHSULOTLARIM")
             print("=" * 60)
 
-            if products:
-                show_products_table(products)
-            else:
+            if not self.browse_user_products(user_id):
                 print("Sizning mahsulotingiz yo'q\n")
 
             print("1. Mahsulot qo'shish")
@@ -233,13 +281,10 @@ class MenuHandler:
             show_error("To'g'ri formatda kiriting")
 
     def edit_product(self, user_id: str):
-        products = self.app.product_service.get_user_products(user_id)
-        if not products:
+        if not self.browse_user_products(user_id):
             show_error("Mahsulotingiz yo'q")
             return
 
-        show_products_table(products)
-
         try:
             product_id = int(input("\nYangilanish uchun product ID: "))
 
@@ -278,13 +323,10 @@ class MenuHandler:
             show_error("To'g'ri formatda kiriting")
 
     def delete_product(self, user_id: str):
-        products = self.app.product_service.get_user_products(user_id)
-        if not products:
+        if not self.browse_user_products(user_id):
             show_error("Mahsulotingiz yo'q")
             return
 
-        show_products_table(products)
-
         try:
             product_id = int(input("\nO'chiriladigan product ID: "))
             success, message = self.app.product_service.delete_product(
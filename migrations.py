@@ -0,0 +1,439 @@
+from sqlalchemy import inspect, text
+
+from database import Base
+
+
+def add_missing_columns(connection):
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+
+        for column in table.columns:
+            if column.name in existing:
+                continue
+
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} "
+            ddl += column.type.compile(dialect=connection.dialect)
+
+            default = column.default.arg if column.default is not None else None
+            if isinstance(default, bool):
+                ddl += f" DEFAULT {int(default)}"
+            elif isinstance(default, (int, float)):
+                ddl += f" DEFAULT {default}"
+            elif isinstance(default, str):
+                ddl += f" DEFAULT '{default}'"
+
+            connection.execute(text(ddl))
+
+
+def merge_duplicate_cart_items(connection):
+    connection.execute(
+        text(
+            """
+            UPDATE cart_items
+            SET quantity = (
+                SELECT SUM(other.quantity)
+                FROM cart_items AS other
+                WHERE other.cart_id = cart_items.cart_id
+                  AND other.product_id = cart_items.product_id
+            )
+            WHERE id IN (
+                SELECT MIN(id) FROM cart_items
+                GROUP BY cart_id, product_id
+                HAVING COUNT(*) > 1
+            )
+            """
+        )
+    )
+    connection.execute(
+        text(
+            """
+            DELETE FROM cart_items
+            WHERE id NOT IN (
+                SELECT MIN(id) FROM cart_items GROUP BY cart_id, product_id
+            )
+            """
+        )
+    )
+
+
+def ensure_indexes(connection):
+    inspector = inspect(connection)
+    created = False
+
+    for table in Base.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+
+            if index.name == "uq_cart_items_cart_product":
+                merge_duplicate_cart_items(connection)
+
+            index.create(connection)
+            created = True
+
+    if created:
+        connection.execute(text("ANALYZE"))
+
+
+PRODUCT_SEARCH_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products
+    WHEN new.is_active = 1
+    BEGIN
+        INSERT INTO products_fts(rowid, name, description)
+        VALUES (new.id, new.name, COALESCE(new.description, ''));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products
+    WHEN old.is_active = 1
+    BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, COALESCE(old.description, ''));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_au
+    AFTER UPDATE OF name, description, is_active ON products
+    BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        SELECT 'delete', old.id, old.name, COALESCE(old.description, '')
+        WHERE old.is_active = 1;
+        INSERT INTO products_fts(rowid, name, description)
+        SELECT new.id, new.name, COALESCE(new.description, '')
+        WHERE new.is_active = 1;
+    END
+    """,
+]
+
+
+def ensure_product_search(connection):
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'")
+    ).first()
+
+    if not exists:
+        connection.execute(
+            text(
+                """
+                CREATE VIRTUAL TABLE products_fts USING fts5(
+                    name,
+                    description,
+                    content='products',
+                    content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2',
+                    prefix='2 3'
+                )
+                """
+            )
+        )
+        connection.execute(
+            text(
+                """
+                INSERT INTO products_fts(rowid, name, description)
+                SELECT id, name, COALESCE(description, '')
+                FROM products
+                WHERE is_active = 1
+                """
+            )
+        )
+
+    for trigger in PRODUCT_SEARCH_TRIGGERS:
+        connection.execute(text(trigger))
+
+
+def ensure_sales_rollups(connection):
+    from services.report_service import rebuild_rollups
+
+    has_rollups = connection.execute(
+        text("SELECT 1 FROM daily_order_rollups LIMIT 1")
+    ).first()
+    has_orders = connection.execute(text("SELECT 1 FROM orders LIMIT 1")).first()
+
+    if has_orders and not has_rollups:
+        backfill_order_item_snapshots(connection)
+        rebuild_rollups(connection)
+
+
+def ensure_cart_totals(connection):
+    from services.cart_service import refresh_cart_totals
+
+    stale = connection.execute(
+        text(
+            """
+            SELECT DISTINCT carts.id FROM carts
+            JOIN cart_items ON cart_items.cart_id = carts.id
+            WHERE carts.items_count = 0
+            """
+        )
+    ).scalars().all()
+
+    if stale:
+        refresh_cart_totals(connection, stale)
+
+
+def ensure_order_summaries(connection):
+    from services.order_service import order_summary
+
+    rows = connection.execute(
+        text(
+            """
+            SELECT order_items.order_id, order_items.quantity, products.name
+            FROM order_items
+            JOIN products ON products.id = order_items.product_id
+            WHERE order_items.order_id IN (
+                SELECT id FROM orders WHERE items_count = 0
+            )
+            ORDER BY order_items.order_id, order_items.id
+            """
+        )
+    ).all()
+
+    counts = {}
+    names = {}
+    for order_id, quantity, name in rows:
+        counts[order_id] = counts.get(order_id, 0) + quantity
+        names.setdefault(order_id, []).append(name)
+
+    if counts:
+        connection.execute(
+            text(
+                "UPDATE orders SET items_count = :items_count, summary = :summary "
+                "WHERE id = :id"
+            ),
+            [
+                {
+                    "id": order_id,
+                    "items_count": count,
+                    "summary": order_summary(names[order_id]),
+                }
+                for order_id, count in counts.items()
+            ],
+        )
+
+
+CATEGORY_COUNT_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS category_counts_ai AFTER INSERT ON products
+    WHEN new.is_active = 1 AND new.category_id IS NOT NULL
+    BEGIN
+        INSERT INTO category_counts (category_id, products_count)
+        VALUES (new.category_id, 1)
+        ON CONFLICT (category_id) DO UPDATE SET products_count = products_count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS category_counts_ad AFTER DELETE ON products
+    WHEN old.is_active = 1 AND old.category_id IS NOT NULL
+    BEGIN
+        UPDATE category_counts SET products_count = products_count - 1
+        WHERE category_id = old.category_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS category_counts_au
+    AFTER UPDATE OF category_id, is_active ON products
+    WHEN old.category_id IS NOT new.category_id OR old.is_active IS NOT new.is_active
+    BEGIN
+        UPDATE category_counts SET products_count = products_count - 1
+        WHERE category_id = old.category_id AND old.is_active = 1;
+        INSERT INTO category_counts (category_id, products_count)
+        SELECT new.category_id, 1
+        WHERE new.is_active = 1 AND new.category_id IS NOT NULL
+        ON CONFLICT (category_id) DO UPDATE SET products_count = products_count + 1;
+    END
+    """,
+]
+
+
+def backfill_categories(connection):
+    from services.category_service import ensure_categories, normalize_category
+
+    labels = connection.execute(
+        text("SELECT DISTINCT category FROM products WHERE category_id IS NULL")
+    ).scalars().all()
+    categories = ensure_categories(connection, labels)
+
+    rows = []
+    for label in labels:
+        if normalize_category(label):
+            category_id, name = categories[normalize_category(label)]
+            rows.append({"label": label, "category_id": category_id, "category": name})
+
+    if rows:
+        connection.execute(
+            text(
+                "UPDATE products SET category_id = :category_id, category = :category "
+                "WHERE category_id IS NULL AND category = :label"
+            ),
+            rows,
+        )
+
+
+def ensure_category_dimension(connection):
+    from services.category_service import rebuild_category_counts
+
+    add_missing_columns(connection)
+    backfill_categories(connection)
+    ensure_indexes(connection)
+
+    for trigger in CATEGORY_COUNT_TRIGGERS:
+        connection.execute(text(trigger))
+
+    rebuild_category_counts(connection)
+
+
+def normalize_category_names(connection):
+    from services.category_service import (
+        ensure_categories,
+        normalize_category,
+        rebuild_category_counts,
+    )
+
+    unnormalized = [
+        (category_id, name)
+        for category_id, name in connection.execute(text("SELECT id, name FROM categories"))
+        if normalize_category(name) != name
+    ]
+    if not unnormalized:
+        return
+
+    categories = ensure_categories(connection, [name for _, name in unnormalized])
+    for old_id, name in unnormalized:
+        new_id, new_name = categories.get(normalize_category(name), (None, name))
+        connection.execute(
+            text(
+                "UPDATE products SET category_id = :new_id, category = :category "
+                "WHERE category_id = :old_id"
+            ),
+            {"new_id": new_id, "category": new_name, "old_id": old_id},
+        )
+        connection.execute(
+            text("DELETE FROM category_counts WHERE category_id = :old_id"), {"old_id": old_id}
+        )
+        connection.execute(text("DELETE FROM categories WHERE id = :old_id"), {"old_id": old_id})
+
+    rebuild_category_counts(connection)
+
+
+def normalize_order_item_categories(connection):
+    from services.category_service import category_key, normalize_category
+    from services.report_service import rebuild_rollups
+
+    stored = {
+        category_key(name): name
+        for name in connection.execute(text("SELECT name FROM categories")).scalars()
+    }
+    labels = connection.execute(
+        text(
+            "SELECT DISTINCT category_at_purchase FROM order_items "
+            "WHERE category_at_purchase IS NOT NULL"
+        )
+    ).scalars().all()
+
+    renamed = []
+    for label in labels:
+        category = stored.get(category_key(label), normalize_category(label))
+        if category and category != label:
+            renamed.append({"label": label, "category": category})
+
+    if renamed:
+        connection.execute(
+            text(
+                "UPDATE order_items SET category_at_purchase = :category "
+                "WHERE category_at_purchase = :label"
+            ),
+            renamed,
+        )
+        rebuild_rollups(connection)
+
+
+def backfill_order_item_snapshots(connection) -> int:
+    result = connection.execute(
+        text(
+            """
+            UPDATE order_items SET
+                category_at_purchase = (
+                    SELECT category FROM products WHERE products.id = order_items.product_id
+                ),
+                seller_id_at_purchase = (
+                    SELECT user_id FROM products WHERE products.id = order_items.product_id
+                )
+            WHERE category_at_purchase IS NULL OR seller_id_at_purchase IS NULL
+            """
+        )
+    )
+    return result.rowcount
+
+
+def ensure_order_item_snapshots(connection):
+    from services.report_service import rebuild_rollups
+
+    add_missing_columns(connection)
+    if backfill_order_item_snapshots(connection):
+        rebuild_rollups(connection)
+
+
+MIGRATIONS = [
+    (1, add_missing_columns),
+    (2, ensure_indexes),
+    (3, ensure_product_search),
+    (4, ensure_sales_rollups),
+    (5, ensure_cart_totals),
+    (6, ensure_order_summaries),
+    (7, ensure_category_dimension),
+    (8, ensure_indexes),
+    (9, ensure_order_item_snapshots),
+    (10, normalize_category_names),
+    (11, normalize_order_item_categories),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def read_schema_version(bind) -> int:
+    with bind.connect() as connection:
+        return _schema_version(connection)
+
+
+def _schema_version(connection) -> int:
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'")
+    ).first()
+    if not exists:
+        return 0
+
+    return connection.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+
+
+def run_migrations(engine):
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+        )
+        version = _schema_version(connection)
+
+        for number, migration in MIGRATIONS:
+            if number <= version:
+                continue
+
+            migration(connection)
+            connection.execute(
+                text("INSERT INTO schema_version (version) VALUES (:version)"),
+                {"version": number},
+            )
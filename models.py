@@ -2,8 +2,9 @@ from sqlalchemy import Column, Integer, String
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Index, func, text
 from sqlalchemy import Column, Integer, String
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -29,9 +30,57 @@ class User(Base):
         "Order", back_populates="user", cascade="all, delete-orphan"
     )
 
+    def full_name(self):
+        return f"{self.first_name or ''} {self.last_name or ''}".strip()
+
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_user_id", "user_id"),
+        Index(
+            "ix_products_active_name",
+            "name",
+            "id",
+            sqlite_where=text("is_active = 1"),
+        ),
+        Index(
+            "ix_products_active_user_name",
+            "user_id",
+            "name",
+            "id",
+            sqlite_where=text("is_active = 1"),
+        ),
+        Index(
+            "ix_products_active_category_name",
+            "category_id",
+            "name",
+            "id",
+            sqlite_where=text("is_active = 1"),
+        ),
+        Index("ix_products_active_price", "price", "id", sqlite_where=text("is_active = 1")),
+        Index(
+            "ix_products_active_category_price",
+            "category_id",
+            "price",
+            "id",
+            sqlite_where=text("is_active = 1"),
+        ),
+        Index(
+            "ix_products_active_user_price",
+            "user_id",
+            "price",
+            "id",
+            sqlite_where=text("is_active = 1"),
+        ),
+        Index("ix_products_active_id", "id", sqlite_where=text("is_active = 1")),
+        Index(
+            "ix_products_active_category_id",
+            "category_id",
+            "id",
+            sqlite_where=text("is_active = 1"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(
@@ -42,15 +91,22 @@ class Product(Base):
 
     name = Column(String, nullable=False)
     category = Column(String, nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"))
     price = Column(Float, nullable=False)
+    sale = Column(Integer, default=0)
     stock = Column(Integer, default=0)
     description = Column(String, default="")
     is_active = Column(Boolean, default=True)
+    stock_shards = Column(Integer, default=0)
+    version = Column(Integer, nullable=False, default=1)
 
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
 
+    __mapper_args__ = {"version_id_col": version}
+
     owner = relationship("User", back_populates="products")
+    category_ref = relationship("Category", back_populates="products")
 
     cart_items = relationship(
         "CartItem", back_populates="product", cascade="all, delete-orphan"
@@ -70,11 +126,51 @@ class Product(Base):
         return self.stock >= quantity
 
 
+class Category(Base):
+    __tablename__ = "categories"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(100, collation="NOCASE"), nullable=False, unique=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    products = relationship("Product", back_populates="category_ref")
+
+    def __repr__(self):
+        return f"<Category(id={self.id}, name='{self.name}')>"
+
+
+class CategoryCount(Base):
+    __tablename__ = "category_counts"
+
+    category_id = Column(
+        Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True
+    )
+    products_count = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<CategoryCount(category_id={self.category_id}, products_count={self.products_count})>"
+
+
+class ProductStockShard(Base):
+    __tablename__ = "product_stock_shards"
+
+    product_id = Column(
+        Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True
+    )
+    shard = Column(Integer, primary_key=True)
+    stock = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<ProductStockShard(product_id={self.product_id}, shard={self.shard}, stock={self.stock})>"
+
+
 class Cart(Base):
     __tablename__ = "carts"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(String, ForeignKey("users.id"), unique=True, nullable=False)
+    items_count = Column(Integer, default=0, nullable=False)
+    total_price = Column(Float, default=0.0, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -84,23 +180,24 @@ class Cart(Base):
     )
 
     def __repr__(self):
-        return f"<Cart(user_id='{self.user_id}', items_count={len(self.items)})>"
+        return f"<Cart(user_id='{self.user_id}', items_count={self.items_count})>"
 
     def get_total_price(self):
-        total = 0
-        for item in self.items:
-            total += item.get_total_price()
-        return total
+        return self.total_price or 0
 
     def get_items_count(self):
-        return sum(item.quantity for item in self.items)
+        return self.items_count or 0
 
     def is_empty(self):
-        return len(self.items) == 0
+        return not self.items_count
 
 
 class CartItem(Base):
     __tablename__ = "cart_items"
+    __table_args__ = (
+        Index("uq_cart_items_cart_product", "cart_id", "product_id", unique=True),
+        Index("ix_cart_items_product_id", "product_id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     cart_id = Column(Integer, ForeignKey("carts.id"), nullable=False)
@@ -120,14 +217,24 @@ class CartItem(Base):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_user_created", "user_id", "created_at", "id"),
+        Index("ix_orders_created", "created_at", "id"),
+        Index("ix_orders_status", "status"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
     total_price = Column(Float, default=0)
+    items_count = Column(Integer, default=0, nullable=False)
+    summary = Column(String(255), default="")
     status = Column(String(20), default="pending")
+    version = Column(Integer, nullable=False, default=1)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __mapper_args__ = {"version_id_col": version}
+
     user = relationship("User", back_populates="orders")
     items = relationship(
         "OrderItem", back_populates="order", cascade="all, delete-orphan"
@@ -140,11 +247,15 @@ class Order(Base):
         self.total_price = sum(item.get_total_price() for item in self.items)
 
     def get_items_count(self):
-        return sum(item.quantity for item in self.items)
+        return self.items_count or 0
 
 
 class OrderItem(Base):
     __tablename__ = "order_items"
+    __table_args__ = (
+        Index("ix_order_items_order_id", "order_id"),
+        Index("ix_order_items_product_id", "product_id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
@@ -152,6 +263,8 @@ class OrderItem(Base):
     quantity = Column(Integer, default=1, nullable=False)
     price_at_purchase = Column(Float, nullable=False)
     sale_at_purchase = Column(Integer, default=0)
+    category_at_purchase = Column(String)
+    seller_id_at_purchase = Column(Integer)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     order = relationship("Order", back_populates="items")
@@ -161,6 +274,43 @@ class OrderItem(Base):
         return f"<OrderItem(product='{self.product.name}', qty={self.quantity})>"
 
     def get_total_price(self):
-        discount = (self.price_at_purchase * self.sale_at_purchase) / 100
+        discount = (self.price_at_purchase * (self.sale_at_purchase or 0)) / 100
         final_price = self.price_at_purchase - discount
         return final_price * self.quantity
+
+    @hybrid_property
+    def line_total(self):
+        return self.get_total_price()
+
+    @line_total.expression
+    def line_total(cls):
+        discount = cls.price_at_purchase * func.coalesce(cls.sale_at_purchase, 0) / 100.0
+        return (cls.price_at_purchase - discount) * cls.quantity
+
+
+class SalesRollup(Base):
+    __tablename__ = "sales_rollups"
+
+    day = Column(String(10), primary_key=True)
+    status = Column(String(20), primary_key=True)
+    category = Column(String, primary_key=True)
+    seller_id = Column(Integer, primary_key=True)
+    revenue = Column(Float, default=0, nullable=False)
+    units_sold = Column(Integer, default=0, nullable=False)
+    orders_count = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<SalesRollup(day='{self.day}', category='{self.category}', revenue={self.revenue})>"
+
+
+class DailyOrderRollup(Base):
+    __tablename__ = "daily_order_rollups"
+
+    day = Column(String(10), primary_key=True)
+    status = Column(String(20), primary_key=True)
+    orders_count = Column(Integer, default=0, nullable=False)
+    revenue = Column(Float, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<DailyOrderRollup(day='{self.day}', status='{self.status}', revenue={self.revenue})>"
+
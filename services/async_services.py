@@ -0,0 +1,78 @@
+import inspect
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.cart_service import CartService
+from services.catalog_service import CatalogService
+from services.category_service import CategoryService
+from services.order_service import OrderService
+from services.product_service import ProductService
+from services.user_service import UserService
+from utils.retry import retry_async
+
+
+def _async_method(name: str, member):
+    policy = getattr(member, "conflict_policy", None)
+
+    async def method(self, *args, **kwargs):
+        sync_method = getattr(self._service, name)
+        return await self.session.run_sync(lambda _: sync_method(*args, **kwargs))
+
+    async def retrying_method(self, *args, **kwargs):
+        async def attempt(*call_args, **call_kwargs):
+            return await self.session.run_sync(
+                lambda _: member.__wrapped__(self._service, *call_args, **call_kwargs)
+            )
+
+        return await retry_async(policy, attempt, self.session.rollback, *args, **kwargs)
+
+    method = method if policy is None else retrying_method
+    method.__name__ = name
+    return method
+
+
+class AsyncServiceProxy:
+    service_class = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        for name, member in inspect.getmembers(cls.service_class, inspect.isfunction):
+            if not name.startswith("_") and name not in cls.__dict__:
+                setattr(cls, name, _async_method(name, member))
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self._service = self.service_class(session.sync_session)
+
+
+class AsyncUserService(AsyncServiceProxy):
+    service_class = UserService
+
+    @property
+    def logged_user(self):
+        return self._service.logged_user
+
+    @logged_user.setter
+    def logged_user(self, user):
+        self._service.logged_user = user
+
+
+class AsyncProductService(AsyncServiceProxy):
+    service_class = ProductService
+
+
+class AsyncCategoryService(AsyncServiceProxy):
+    service_class = CategoryService
+
+
+class AsyncCatalogService(AsyncServiceProxy):
+    service_class = CatalogService
+
+
+class AsyncCartService(AsyncServiceProxy):
+    service_class = CartService
+
+
+class AsyncOrderService(AsyncServiceProxy):
+    service_class = OrderService
@@ -1,8 +1,66 @@
-from typing import List, Optional
+from typing import Iterable, List, Optional
 
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
 from models import Cart, CartItem, Product, User
+from services.loading_profiles import get_loading_options
+from services.product_cache import load_product, load_products
+from utils.retry import CONFLICT_MESSAGE, is_conflict, retry_on_conflict
+
+
+carts = Cart.__table__
+cart_items = CartItem.__table__
+products = Product.__table__
+
+
+def upsert_cart_lines(bind, rows: List[dict]) -> dict[int, int]:
+    statement = sqlite_insert(cart_items)
+    statement = statement.on_conflict_do_update(
+        index_elements=["cart_id", "product_id"],
+        set_={"quantity": cart_items.c.quantity + statement.excluded.quantity},
+    ).returning(cart_items.c.product_id, cart_items.c.quantity)
+    return dict(bind.execute(statement.values(rows)).all())
+
+
+def final_price(price, sale):
+    return price * (100 - func.coalesce(sale, 0)) / 100.0
+
+
+def refresh_cart_totals(
+    bind,
+    cart_ids: Optional[Iterable[int]] = None,
+    product_ids: Optional[Iterable[int]] = None,
+):
+    line_total = final_price(products.c.price, products.c.sale) * cart_items.c.quantity
+    statement = update(carts).values(
+        items_count=select(func.coalesce(func.sum(cart_items.c.quantity), 0))
+        .where(cart_items.c.cart_id == carts.c.id)
+        .scalar_subquery(),
+        total_price=select(func.coalesce(func.sum(line_total), 0.0))
+        .select_from(cart_items.join(products, products.c.id == cart_items.c.product_id))
+        .where(cart_items.c.cart_id == carts.c.id)
+        .scalar_subquery(),
+    )
+
+    if cart_ids is not None:
+        cart_ids = list(cart_ids)
+        if not cart_ids:
+            return
+        statement = statement.where(carts.c.id.in_(cart_ids))
+
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        if not product_ids:
+            return
+        statement = statement.where(
+            carts.c.id.in_(
+                select(cart_items.c.cart_id).where(cart_items.c.product_id.in_(product_ids))
+            )
+        )
+
+    bind.execute(statement)
 
 
 class CartService:
@@ -10,9 +68,15 @@ class CartService:
     def __init__(self, session: Session):
         self.session = session
 
-    def get_cart(self, user_id: str) -> Optional[Cart]:
-        return self.session.query(Cart).filter(Cart.user_id == user_id).first()
+    def get_cart(self, user_id: str, profile: Optional[str] = None) -> Optional[Cart]:
+        return (
+            self.session.query(Cart)
+            .options(*get_loading_options(profile))
+            .filter(Cart.user_id == user_id)
+            .first()
+        )
 
+    @retry_on_conflict((False, CONFLICT_MESSAGE))
     def add_to_cart(
         self, user_id: str, product_id: int, quantity: int = 1
     ) -> tuple[bool, str]:
@@ -26,9 +90,7 @@ class CartService:
             if not cart:
                 return False, "Savat topilmadi"
 
-            product = (
-                self.session.query(Product).filter(Product.id == product_id).first()
-            )
+            product = load_product(self.session, product_id)
 
             if not product:
                 return False, "Mahsulot topilmadi"
@@ -42,34 +104,25 @@ class CartService:
             if not product.can_sell(quantity):
                 return False, f"Yetarli stock yok. Mavjud: {product.stock}"
 
-            cart_item = (
-                self.session.query(CartItem)
-                .filter(CartItem.cart_id == cart.id, CartItem.product_id == product_id)
-                .first()
-            )
-
-            if cart_item:
+            new_quantity = upsert_cart_lines(
+                self.session,
+                [{"cart_id": cart.id, "product_id": product_id, "quantity": quantity}],
+            )[product_id]
 
-                new_quantity = cart_item.quantity + quantity
-                if not product.can_sell(new_quantity):
-                    return False, f"Yetarli stock yok. Mavjud: {product.stock}"
+            if not product.can_sell(new_quantity):
+                self.session.rollback()
+                return False, f"Yetarli stock yok. Mavjud: {product.stock}"
 
-                cart_item.quantity = new_quantity
-                self.session.commit()
-                return (
-                    True,
-                    f"'{product.name}' savatga qo'shildi (jami: {new_quantity} dona)",
-                )
-            else:
+            refresh_cart_totals(self.session, [cart.id])
+            self.session.commit()
 
-                new_item = CartItem(
-                    cart_id=cart.id, product_id=product_id, quantity=quantity
-                )
-                self.session.add(new_item)
-                self.session.commit()
+            if new_quantity == quantity:
                 return True, f"'{product.name}' savatga qo'shildi"
+            return True, f"'{product.name}' savatga qo'shildi (jami: {new_quantity} dona)"
 
         except Exception as e:
+            if is_conflict(e):
+                raise
             self.session.rollback()
             return False, f"Xato: {str(e)}"
 
@@ -90,6 +143,8 @@ class CartService:
 
             product_name = cart_item.product.name
             self.session.delete(cart_item)
+            self.session.flush()
+            refresh_cart_totals(self.session, [cart.id])
             self.session.commit()
 
             return True, f"'{product_name}' savatdan olib tashlandi"
@@ -124,6 +179,8 @@ class CartService:
                 return False, f"Yetarli stock yok. Mavjud: {product.stock}"
 
             cart_item.quantity = new_quantity
+            self.session.flush()
+            refresh_cart_totals(self.session, [cart.id])
             self.session.commit()
 
             return True, f"Miqdor yangilandi: {new_quantity}"
@@ -139,6 +196,9 @@ class CartService:
                 return False, "Savat topilmadi"
 
             self.session.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
+            self.session.execute(
+                update(carts).where(carts.c.id == cart.id).values(items_count=0, total_price=0.0)
+            )
 
             self.session.commit()
             return True, "Savat tozalandi"
@@ -147,21 +207,173 @@ class CartService:
             self.session.rollback()
             return False, f"Xato: {str(e)}"
 
-    def get_cart_items(self, user_id: str) -> List[CartItem]:
-        cart = self.get_cart(user_id)
-        if not cart:
-            return []
+    def apply_operations(
+        self, user_id: str, operations: List[dict]
+    ) -> List[tuple[bool, str]]:
+        try:
+            cart_id = self.session.scalar(
+                select(Cart.id).where(Cart.user_id == user_id)
+            )
+            if cart_id is None:
+                return [(False, "Savat topilmadi") for _ in operations]
+
+            products = load_products(
+                self.session,
+                (op["product_id"] for op in operations if op.get("product_id") is not None),
+            )
+            original = dict(
+                self.session.execute(
+                    select(CartItem.product_id, CartItem.quantity).where(
+                        CartItem.cart_id == cart_id
+                    )
+                ).all()
+            )
+
+            quantities = dict(original)
+            results = [self._apply_operation(op, quantities, products) for op in operations]
+
+            inserts = [
+                {"cart_id": cart_id, "product_id": product_id, "quantity": quantity}
+                for product_id, quantity in quantities.items()
+                if product_id not in original
+            ]
+            updates = [
+                {"b_product_id": product_id, "b_quantity": quantity}
+                for product_id, quantity in quantities.items()
+                if product_id in original and original[product_id] != quantity
+            ]
+            removed = [product_id for product_id in original if product_id not in quantities]
+
+            if removed:
+                self.session.execute(
+                    delete(cart_items).where(
+                        cart_items.c.cart_id == cart_id, cart_items.c.product_id.in_(removed)
+                    )
+                )
+            if updates:
+                self.session.execute(
+                    update(cart_items)
+                    .where(
+                        cart_items.c.cart_id == cart_id,
+                        cart_items.c.product_id == bindparam("b_product_id"),
+                    )
+                    .values(quantity=bindparam("b_quantity")),
+                    updates,
+                )
+            if inserts:
+                merged = upsert_cart_lines(self.session, inserts)
+                short = [
+                    products[product_id]
+                    for product_id, quantity in merged.items()
+                    if not products[product_id].can_sell(quantity)
+                ]
+                if short:
+                    self.session.rollback()
+                    return [
+                        (False, f"Yetarli stock yok. Mavjud: {short[0].stock}")
+                        for _ in operations
+                    ]
+            if removed or updates or inserts:
+                refresh_cart_totals(self.session, [cart_id])
+
+            self.session.commit()
+            return results
+
+        except Exception as e:
+            self.session.rollback()
+            return [(False, f"Xato: {str(e)}") for _ in operations]
+
+    def _apply_operation(self, op: dict, quantities: dict, products: dict) -> tuple[bool, str]:
+        action = op.get("action")
+
+        if action == "clear":
+            quantities.clear()
+            return True, "Savat tozalandi"
+
+        product_id = op.get("product_id")
+        product = products.get(product_id)
+        quantity = op.get("quantity", 1)
+
+        if action == "remove":
+            if product_id not in quantities:
+                return False, "Mahsulot savatda topilmadi"
+            del quantities[product_id]
+            return True, f"'{product.name}' savatdan olib tashlandi"
+
+        if action not in ("add", "update"):
+            return False, f"Noma'lum amal: '{action}'"
+
+        if not product:
+            return False, "Mahsulot topilmadi"
+
+        if action == "update":
+            if product_id not in quantities:
+                return False, "Mahsulot savatda topilmadi"
+            if quantity <= 0:
+                del quantities[product_id]
+                return True, f"'{product.name}' savatdan olib tashlandi"
+            if not product.can_sell(quantity):
+                return False, f"Yetarli stock yok. Mavjud: {product.stock}"
+            quantities[product_id] = quantity
+            return True, f"Miqdor yangilandi: {quantity}"
+
+        if not product.is_active:
+            return False, f"'{product.name}' hozirda sotilmayapti"
+
+        if quantity <= 0:
+            return False, "Miqdor 1 dan katta bo'lishi kerak"
+
+        new_quantity = quantities.get(product_id, 0) + quantity
+        if not product.can_sell(new_quantity):
+            return False, f"Yetarli stock yok. Mavjud: {product.stock}"
+
+        quantities[product_id] = new_quantity
+        return True, f"'{product.name}' savatga qo'shildi (jami: {new_quantity} dona)"
+
+    def get_cart_items(
+        self, user_id: str, profile: Optional[str] = "cart_items"
+    ) -> List[CartItem]:
+        return (
+            self.session.query(CartItem)
+            .join(Cart, Cart.id == CartItem.cart_id)
+            .options(*get_loading_options(profile))
+            .filter(Cart.user_id == user_id)
+            .order_by(CartItem.id)
+            .all()
+        )
+
+    def get_cart_lines(self, user_id: str) -> list:
+        unit_price = final_price(Product.price, Product.sale)
+        return self.session.execute(
+            select(
+                CartItem.product_id,
+                Product.name,
+                CartItem.quantity,
+                unit_price.label("unit_price"),
+                (unit_price * CartItem.quantity).label("line_total"),
+            )
+            .join(Cart, Cart.id == CartItem.cart_id)
+            .join(Product, Product.id == CartItem.product_id)
+            .where(Cart.user_id == user_id)
+            .order_by(CartItem.id)
+        ).all()
+
+    def get_cart_totals(self, user_id: str) -> dict:
+        row = self.session.execute(
+            select(Cart.items_count, Cart.total_price).where(Cart.user_id == user_id)
+        ).first()
+
+        if not row:
+            return {"items_count": 0, "total_price": 0}
 
-        return cart.items
+        return {"items_count": row.items_count or 0, "total_price": row.total_price or 0}
 
-    def get_cart_summary(self, user_id: str) -> dict:
-        cart = self.get_cart(user_id)
+    def get_cart_summary(
+        self, user_id: str, profile: Optional[str] = "cart_items"
+    ) -> dict:
+        totals = self.get_cart_totals(user_id)
 
-        if not cart or cart.is_empty():
-            return {"items_count": 0, "total_price": 0, "items": []}
+        if not totals["items_count"]:
+            return {**totals, "items": []}
 
-        return {
-            "items_count": cart.get_items_count(),
-            "total_price": cart.get_total_price(),
-            "items": cart.items,
-        }
\ No newline at end of file
+        return {**totals, "items": self.get_cart_items(user_id, profile=profile)}
\ No newline at end of file
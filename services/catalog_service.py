@@ -0,0 +1,216 @@
+from dataclasses import dataclass
+import itertools
+from typing import List, Optional
+
+from sqlalchemy import func, select, true, tuple_
+from sqlalchemy.orm import Session
+
+from models import Category, CategoryCount, Product
+from services.category_service import normalize_category
+from utils.pagination import DEFAULT_PAGE_SIZE, decode_cursor, split_page
+from utils.read_routing import read_only
+
+
+CATALOG_SORTS = {
+    "name": ((Product.name, Product.id), False),
+    "price": ((Product.price, Product.id), False),
+    "price_desc": ((Product.price, Product.id), True),
+    "newest": ((Product.id,), True),
+}
+
+PRICE_SORTS = ("price", "price_desc")
+COUNT_ESTIMATE_CAP = 10_000
+MISSING_CATEGORY_ID = -1
+
+
+@dataclass(frozen=True)
+class CatalogQuery:
+    category: Optional[str] = None
+    seller_id: Optional[int] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    in_stock: bool = False
+    sort: str = "name"
+
+    def __post_init__(self):
+        if self.sort not in CATALOG_SORTS:
+            raise ValueError(
+                f"Noma'lum saralash: '{self.sort}'. Mumkin: {', '.join(CATALOG_SORTS)}"
+            )
+
+        if self.min_price is not None and self.min_price < 0:
+            raise ValueError("Minimal narx manfiy bo'lishi mumkin emas")
+
+        if (
+            self.min_price is not None
+            and self.max_price is not None
+            and self.min_price > self.max_price
+        ):
+            raise ValueError("Minimal narx maksimal narxdan katta bo'lishi mumkin emas")
+
+
+def expects_index_search(query: CatalogQuery) -> bool:
+    has_price_range = query.min_price is not None or query.max_price is not None
+    return (
+        query.category is not None
+        or query.seller_id is not None
+        or (has_price_range and query.sort in PRICE_SORTS)
+    )
+
+
+def analyze_plan(
+    details: List[str], search_expected: bool = False, rowid_order: bool = False
+) -> dict:
+    temp_sorts = [detail for detail in details if "TEMP B-TREE" in detail]
+    ordered_rowid_walk = rowid_order and not temp_sorts
+    scans = [detail for detail in details if detail.startswith("SCAN ")]
+    full_scans = [
+        detail for detail in scans if " USING " not in detail and not ordered_rowid_walk
+    ]
+    index_scans = [detail for detail in scans if detail not in full_scans]
+    return {
+        "plan": details,
+        "full_scan": bool(full_scans),
+        "unbounded_index_scan": search_expected and bool(index_scans),
+        "temp_sort": bool(temp_sorts),
+    }
+
+
+class CatalogService:
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    @read_only
+    def get_page(
+        self,
+        query: CatalogQuery,
+        cursor: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> tuple[List[Product], Optional[str]]:
+        category_id = self._category_id(query)
+        if category_id == MISSING_CATEGORY_ID:
+            return [], None
+
+        columns, descending = CATALOG_SORTS[query.sort]
+        statement = self._statement(select(Product), query, category_id)
+
+        after = decode_cursor(cursor)
+        if after:
+            if len(after) != len(columns):
+                raise ValueError(f"Noto'g'ri cursor: {cursor}")
+            key = tuple_(*columns)
+            statement = statement.where(
+                key < tuple_(*after) if descending else key > tuple_(*after)
+            )
+
+        rows = self.session.scalars(
+            statement.order_by(*self._ordering(query)).limit(page_size + 1)
+        ).all()
+        return split_page(
+            rows,
+            page_size,
+            lambda product: tuple(getattr(product, column.key) for column in columns),
+        )
+
+    @read_only
+    def estimate_count(self, query: CatalogQuery) -> dict:
+        category_id = self._category_id(query)
+        if category_id == MISSING_CATEGORY_ID:
+            return {"count": 0, "exact": True}
+
+        only_category = (
+            query.seller_id is None
+            and query.min_price is None
+            and query.max_price is None
+            and not query.in_stock
+        )
+        if only_category:
+            counter = select(func.coalesce(func.sum(CategoryCount.products_count), 0))
+            if category_id is not None:
+                counter = counter.where(CategoryCount.category_id == category_id)
+            return {"count": self.session.scalar(counter), "exact": True}
+
+        matching = self._statement(select(Product.id), query, category_id).limit(
+            COUNT_ESTIMATE_CAP + 1
+        )
+        count = self.session.scalar(select(func.count()).select_from(matching.subquery()))
+        return {
+            "count": min(count, COUNT_ESTIMATE_CAP),
+            "exact": count <= COUNT_ESTIMATE_CAP,
+        }
+
+    def explain(self, query: CatalogQuery, page_size: int = DEFAULT_PAGE_SIZE) -> dict:
+        category_id = self._category_id(query)
+        statement = (
+            self._statement(select(Product), query, category_id)
+            .order_by(*self._ordering(query))
+            .limit(page_size + 1)
+        )
+
+        connection = self.session.connection()
+        compiled = statement.compile(
+            dialect=connection.dialect, compile_kwargs={"render_postcompile": True}
+        )
+        parameters = tuple(compiled.params[name] for name in compiled.positiontup)
+        rows = connection.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {compiled.string}", parameters
+        ).all()
+        return analyze_plan(
+            [row[-1] for row in rows],
+            expects_index_search(query),
+            rowid_order=query.sort == "newest",
+        )
+
+    def plan_regressions(self) -> List[dict]:
+        regressions = []
+
+        for category, seller_id, price_range, in_stock, sort in itertools.product(
+            (None, "plan-check"),
+            (None, 1),
+            ((None, None), (10.0, None), (10.0, 100.0)),
+            (False, True),
+            CATALOG_SORTS,
+        ):
+            query = CatalogQuery(
+                category=category,
+                seller_id=seller_id,
+                min_price=price_range[0],
+                max_price=price_range[1],
+                in_stock=in_stock,
+                sort=sort,
+            )
+            report = self.explain(query)
+            if report["full_scan"] or report["unbounded_index_scan"]:
+                regressions.append({"query": query, **report})
+
+        return regressions
+
+    def _category_id(self, query: CatalogQuery) -> Optional[int]:
+        if query.category is None:
+            return None
+
+        category_id = self.session.scalar(
+            select(Category.id).where(Category.name == normalize_category(query.category))
+        )
+        return MISSING_CATEGORY_ID if category_id is None else category_id
+
+    def _statement(self, statement, query: CatalogQuery, category_id: Optional[int]):
+        statement = statement.where(Product.is_active == true())
+
+        if category_id is not None:
+            statement = statement.where(Product.category_id == category_id)
+        if query.seller_id is not None:
+            statement = statement.where(Product.user_id == query.seller_id)
+        if query.min_price is not None:
+            statement = statement.where(Product.price >= query.min_price)
+        if query.max_price is not None:
+            statement = statement.where(Product.price <= query.max_price)
+        if query.in_stock:
+            statement = statement.where(Product.stock > 0)
+
+        return statement
+
+    def _ordering(self, query: CatalogQuery) -> list:
+        columns, descending = CATALOG_SORTS[query.sort]
+        return [column.desc() if descending else column for column in columns]
@@ -0,0 +1,99 @@
+import string
+from typing import Iterable, List, Optional
+
+from sqlalchemy import delete, func, insert, select, true
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models import Category, CategoryCount, Product
+from utils.read_routing import read_only
+
+
+NOCASE_FOLD = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def normalize_category(name: str) -> str:
+    return " ".join((name or "").split())
+
+
+def category_key(name: str) -> str:
+    return normalize_category(name).translate(NOCASE_FOLD)
+
+
+def ensure_categories(bind, names: Iterable[str]) -> dict[str, tuple[int, str]]:
+    names = {normalize_category(name) for name in names}
+    names.discard("")
+    if not names:
+        return {}
+
+    bind.execute(
+        sqlite_insert(Category.__table__).on_conflict_do_nothing(),
+        [{"name": name} for name in names],
+    )
+    rows = bind.execute(
+        select(Category.id, Category.name).where(Category.name.in_(names))
+    ).all()
+    stored = {category_key(name): (category_id, name) for category_id, name in rows}
+    return {name: stored[category_key(name)] for name in names}
+
+
+def ensure_category(bind, name: str) -> tuple[int, str]:
+    return ensure_categories(bind, [name])[normalize_category(name)]
+
+
+def rebuild_category_counts(bind):
+    counts = CategoryCount.__table__
+    bind.execute(delete(counts))
+    bind.execute(
+        insert(counts).from_select(
+            ["category_id", "products_count"],
+            select(Product.category_id, func.count())
+            .where(Product.is_active == true(), Product.category_id.is_not(None))
+            .group_by(Product.category_id),
+        )
+    )
+
+
+class CategoryService:
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    @read_only
+    def get_categories(self) -> List[Category]:
+        return self.session.query(Category).order_by(Category.name).all()
+
+    def get_category(self, name: str) -> Optional[Category]:
+        return (
+            self.session.query(Category)
+            .filter(Category.name == normalize_category(name))
+            .first()
+        )
+
+    @read_only
+    def get_facets(self, include_empty: bool = False) -> List[dict]:
+        products_count = func.coalesce(CategoryCount.products_count, 0).label(
+            "products_count"
+        )
+        query = select(Category.id, Category.name, products_count).outerjoin(
+            CategoryCount, CategoryCount.category_id == Category.id
+        )
+        if not include_empty:
+            query = query.where(CategoryCount.products_count > 0)
+
+        rows = self.session.execute(
+            query.order_by(products_count.desc(), Category.name)
+        ).all()
+        return [
+            {"id": row.id, "name": row.name, "products_count": row.products_count}
+            for row in rows
+        ]
+
+    def rebuild_counts(self) -> tuple[bool, str]:
+        try:
+            rebuild_category_counts(self.session)
+            self.session.commit()
+            return True, "Kategoriya hisoblagichlari qayta hisoblandi"
+        except Exception as e:
+            self.session.rollback()
+            return False, f"Xato: {e}"
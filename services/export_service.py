@@ -0,0 +1,244 @@
+import csv
+import json
+import os
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import Order, OrderItem, Product
+
+
+EXPORT_COLUMNS = [
+    "order_id",
+    "user_id",
+    "status",
+    "order_created_at",
+    "order_total",
+    "item_id",
+    "product_id",
+    "product_name",
+    "quantity",
+    "price_at_purchase",
+    "sale_at_purchase",
+    "line_total",
+]
+
+
+def _serialize(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return value
+
+
+class _CsvWriter:
+
+    def __init__(self, path: str, offset: Optional[int]):
+        resuming = offset is not None and os.path.exists(path)
+        if resuming:
+            os.truncate(path, offset)
+
+        self.file = open(path, "a" if resuming else "w", encoding="utf-8", newline="")
+        self.writer = csv.writer(self.file)
+        if not resuming:
+            self.writer.writerow(EXPORT_COLUMNS)
+
+    def write(self, row: dict):
+        self.writer.writerow([_serialize(row[column]) for column in EXPORT_COLUMNS])
+
+    def commit(self) -> dict:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return {"offset": self.file.tell()}
+
+    def close(self):
+        self.file.close()
+
+
+class _JsonlWriter(_CsvWriter):
+
+    def __init__(self, path: str, offset: Optional[int]):
+        resuming = offset is not None and os.path.exists(path)
+        if resuming:
+            os.truncate(path, offset)
+
+        self.file = open(path, "a" if resuming else "w", encoding="utf-8")
+
+    def write(self, row: dict):
+        record = {column: _serialize(row[column]) for column in EXPORT_COLUMNS}
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class _ParquetWriter:
+
+    def __init__(self, path: str, part: Optional[int]):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise RuntimeError("Parquet eksport uchun 'pyarrow' o'rnatilishi kerak") from e
+
+        self.pyarrow = pyarrow
+        self.parquet = pyarrow.parquet
+        self.directory = path
+        self.part = part or 0
+        self.columns = {column: [] for column in EXPORT_COLUMNS}
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, row: dict):
+        for column in EXPORT_COLUMNS:
+            self.columns[column].append(row[column])
+
+    def commit(self) -> dict:
+        if self.columns["order_id"]:
+            table = self.pyarrow.table(self.columns)
+            part_path = os.path.join(self.directory, f"part-{self.part:06d}.parquet")
+            self.parquet.write_table(table, part_path, compression="zstd")
+            self.part += 1
+            self.columns = {column: [] for column in EXPORT_COLUMNS}
+        return {"part": self.part}
+
+    def close(self):
+        pass
+
+
+EXPORT_WRITERS = {
+    "csv": (_CsvWriter, "offset"),
+    "jsonl": (_JsonlWriter, "offset"),
+    "parquet": (_ParquetWriter, "part"),
+}
+
+
+class OrderExportService:
+
+    def __init__(self, session: Session, batch_size: int = 5000, yield_per: int = 1000):
+        self.session = session
+        self.batch_size = batch_size
+        self.yield_per = yield_per
+
+    def export_orders(
+        self,
+        path: str,
+        file_format: str = "csv",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        statuses: Optional[Iterable[str]] = None,
+        checkpoint_path: Optional[str] = None,
+    ) -> dict:
+        if file_format not in EXPORT_WRITERS:
+            raise ValueError(
+                f"Noma'lum eksport formati: '{file_format}'. "
+                f"Mumkin: {', '.join(EXPORT_WRITERS)}"
+            )
+
+        statuses = sorted(statuses) if statuses else None
+        params = {
+            "path": path,
+            "format": file_format,
+            "start": _serialize(start),
+            "end": _serialize(end),
+            "statuses": statuses,
+        }
+        checkpoint = self._load_checkpoint(checkpoint_path, params)
+
+        writer_class, position_key = EXPORT_WRITERS[file_format]
+        writer = writer_class(path, checkpoint.get(position_key))
+
+        filters = self._filters(start, end, statuses)
+        last_order_id = checkpoint.get("last_order_id", 0)
+        stats = {
+            "orders": checkpoint.get("orders", 0),
+            "rows": checkpoint.get("rows", 0),
+        }
+
+        try:
+            while True:
+                order_ids = self.session.scalars(
+                    select(Order.id)
+                    .where(Order.id > last_order_id, *filters)
+                    .order_by(Order.id)
+                    .limit(self.batch_size)
+                ).all()
+                if not order_ids:
+                    break
+
+                for row in self._iter_rows(last_order_id, order_ids[-1], filters):
+                    writer.write(row)
+                    stats["rows"] += 1
+
+                self.session.rollback()
+
+                last_order_id = order_ids[-1]
+                stats["orders"] += len(order_ids)
+                position = writer.commit()
+
+                self._save_checkpoint(
+                    checkpoint_path,
+                    {**params, **stats, **position, "last_order_id": last_order_id},
+                )
+        finally:
+            writer.close()
+            self.session.rollback()
+
+        return {**stats, "last_order_id": last_order_id}
+
+    def _filters(self, start, end, statuses) -> list:
+        filters = []
+        if start:
+            filters.append(Order.created_at >= start)
+        if end:
+            filters.append(Order.created_at < end)
+        if statuses:
+            filters.append(Order.status.in_(statuses))
+        return filters
+
+    def _iter_rows(self, after_id: int, until_id: int, filters: list):
+        statement = (
+            select(
+                Order.id.label("order_id"),
+                Order.user_id,
+                Order.status,
+                Order.created_at.label("order_created_at"),
+                Order.total_price.label("order_total"),
+                OrderItem.id.label("item_id"),
+                OrderItem.product_id,
+                Product.name.label("product_name"),
+                OrderItem.quantity,
+                OrderItem.price_at_purchase,
+                OrderItem.sale_at_purchase,
+                OrderItem.line_total.label("line_total"),
+            )
+            .join(OrderItem, OrderItem.order_id == Order.id)
+            .join(Product, Product.id == OrderItem.product_id)
+            .where(Order.id > after_id, Order.id <= until_id, *filters)
+            .order_by(Order.id, OrderItem.id)
+            .execution_options(yield_per=self.yield_per)
+        )
+
+        for row in self.session.execute(statement):
+            yield row._mapping
+
+    def _load_checkpoint(self, checkpoint_path: Optional[str], params: dict) -> dict:
+        if not checkpoint_path or not os.path.exists(checkpoint_path):
+            return {}
+
+        with open(checkpoint_path, encoding="utf-8") as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+
+        for key, value in params.items():
+            if checkpoint.get(key) != value:
+                raise ValueError(
+                    f"Checkpoint boshqa eksport uchun yozilgan ('{key}' mos emas)"
+                )
+
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint_path: Optional[str], checkpoint: dict):
+        if not checkpoint_path:
+            return
+
+        temp_path = checkpoint_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as checkpoint_file:
+            json.dump(checkpoint, checkpoint_file)
+        os.replace(temp_path, checkpoint_path)
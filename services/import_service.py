@@ -0,0 +1,183 @@
+import csv
+import json
+import os
+from itertools import islice
+from typing import Iterator, List, Optional
+
+from sqlalchemy import bindparam, case, insert, select, true, update
+from sqlalchemy.orm import Session
+
+from models import Product
+from services.cart_service import refresh_cart_totals
+from services.category_service import ensure_categories, normalize_category
+from services.inventory import set_stock, sharded_products
+from services.product_cache import product_cache
+from services.product_service import validate_product_fields
+
+
+IMPORT_FIELDS = ("name", "category", "category_id", "price", "stock", "description", "sale")
+
+
+class ProductImportService:
+
+    def __init__(self, session: Session, chunk_size: int = 1000, max_errors: int = 1000):
+        self.session = session
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+
+    def import_file(
+        self,
+        path: str,
+        user_id: str,
+        file_format: Optional[str] = None,
+        upsert: bool = False,
+    ) -> dict:
+        file_format = file_format or os.path.splitext(path)[1].lstrip(".").lower()
+
+        with open(path, encoding="utf-8", newline="") as source:
+            if file_format == "csv":
+                records = self._read_csv(source)
+            elif file_format in ("jsonl", "ndjson"):
+                records = self._read_jsonl(source)
+            else:
+                raise ValueError(f"Noma'lum fayl formati: '{file_format}'. Mumkin: csv, jsonl")
+
+            return self.import_records(records, user_id, upsert=upsert)
+
+    def import_records(self, records, user_id: str, upsert: bool = False) -> dict:
+        report = {"inserted": 0, "updated": 0, "duplicates": 0, "failed": 0, "errors": []}
+        numbered = enumerate(records, 1)
+
+        while True:
+            chunk = list(islice(numbered, self.chunk_size))
+            if not chunk:
+                break
+            self._import_chunk(chunk, user_id, upsert, report)
+
+        return report
+
+    def _import_chunk(self, chunk: list, user_id: str, upsert: bool, report: dict):
+        rows = []
+        for row_number, record in chunk:
+            row, error = self._parse_record(record)
+            if error:
+                self._record_error(report, row_number, error)
+                continue
+            row["user_id"] = user_id
+            rows.append((row_number, row))
+
+        if not rows:
+            return
+
+        parsed_count = len(rows)
+        existing = {}
+        if upsert:
+            existing = self._find_existing(user_id, [row["name"] for _, row in rows])
+            rows = list({row["name"]: (row_number, row) for row_number, row in rows}.values())
+
+        try:
+            categories = ensure_categories(self.session, (row["category"] for _, row in rows))
+
+            inserts = []
+            updates = {}
+            for _, row in rows:
+                row["category_id"], row["category"] = categories[
+                    normalize_category(row["category"])
+                ]
+
+                product_id = existing.get(row["name"])
+                if product_id is None:
+                    inserts.append(row)
+                else:
+                    updates[product_id] = {
+                        "b_id": product_id,
+                        **{f"b_{field}": row[field] for field in IMPORT_FIELDS},
+                    }
+
+            if inserts:
+                self.session.execute(insert(Product.__table__), inserts)
+
+            if updates:
+                products = Product.__table__
+                self.session.execute(
+                    update(products)
+                    .where(products.c.id == bindparam("b_id"))
+                    .values(
+                        {
+                            **{field: bindparam(f"b_{field}") for field in IMPORT_FIELDS},
+                            "stock": case(
+                                (products.c.stock_shards > 0, products.c.stock),
+                                else_=bindparam("b_stock"),
+                            ),
+                            "version": products.c.version + 1,
+                        }
+                    ),
+                    list(updates.values()),
+                )
+                for product_id in sharded_products(self.session, updates):
+                    set_stock(self.session, product_id, updates[product_id]["b_stock"])
+                refresh_cart_totals(self.session, product_ids=updates)
+
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            for row_number, _ in rows:
+                self._record_error(report, row_number, f"Xato: {e}")
+            return
+
+        product_cache.invalidate(updates)
+        report["inserted"] += len(inserts)
+        report["updated"] += len(updates)
+        report["duplicates"] += parsed_count - len(rows)
+
+    def _find_existing(self, user_id: str, names: List[str]) -> dict:
+        rows = self.session.execute(
+            select(Product.name, Product.id).where(
+                Product.user_id == user_id,
+                Product.is_active == true(),
+                Product.name.in_(set(names)),
+            )
+        ).all()
+        return {name: product_id for name, product_id in rows}
+
+    def _parse_record(self, record: dict) -> tuple[Optional[dict], Optional[str]]:
+        if not isinstance(record, dict):
+            return None, "Qator obyekt bo'lishi kerak"
+
+        try:
+            row = {
+                "name": str(record.get("name") or "").strip(),
+                "category": str(record.get("category") or "").strip(),
+                "price": float(record.get("price") or 0),
+                "stock": int(record.get("stock") or 0),
+                "description": str(record.get("description") or "").strip(),
+                "sale": int(record.get("sale") or 0),
+            }
+        except (TypeError, ValueError):
+            return None, "Narx, stock yoki chegirma raqam bo'lishi kerak"
+
+        error = validate_product_fields(
+            row["name"], row["category"], row["price"], row["stock"], row["sale"]
+        )
+        if error:
+            return None, error
+
+        return row, None
+
+    def _record_error(self, report: dict, row_number: int, message: str):
+        report["failed"] += 1
+        if len(report["errors"]) < self.max_errors:
+            report["errors"].append((row_number, message))
+
+    def _read_csv(self, source) -> Iterator[dict]:
+        yield from csv.DictReader(source)
+
+    def _read_jsonl(self, source) -> Iterator[dict]:
+        for line in source:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                yield None
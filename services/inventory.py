@@ -0,0 +1,366 @@
+import random
+import threading
+import time
+from typing import Iterable, Optional
+
+from sqlalchemy import bindparam, delete, event, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from models import Product, ProductStockShard
+
+
+AGGREGATE_MAX_AGE = 1.0
+ALL_PRODUCTS = None
+
+_refreshed_at: dict[int, float] = {}
+_stale: set[int] = set()
+_refreshed_lock = threading.Lock()
+
+products = Product.__table__
+shards = ProductStockShard.__table__
+
+
+def sharded_products(session, product_ids: Iterable[int]) -> set[int]:
+    product_ids = list(product_ids)
+    if not product_ids:
+        return set()
+
+    return set(
+        session.scalars(
+            select(Product.id).where(Product.id.in_(product_ids), Product.stock_shards > 0)
+        )
+    )
+
+
+def take_stock(session, quantities: dict[int, int], sharded: Optional[set] = None) -> bool:
+    if sharded is None:
+        sharded = sharded_products(session, quantities)
+
+    plain = [
+        {"pid": product_id, "qty": quantity}
+        for product_id, quantity in quantities.items()
+        if product_id not in sharded
+    ]
+    if plain:
+        taken = session.execute(
+            products.update()
+            .where(
+                products.c.id == bindparam("pid"),
+                products.c.is_active.is_(True),
+                products.c.stock >= bindparam("qty"),
+            )
+            .values(
+                stock=products.c.stock - bindparam("qty"),
+                version=products.c.version + 1,
+            ),
+            plain,
+        ).rowcount
+        if taken != len(plain):
+            return False
+
+    if sharded:
+        active = session.scalars(
+            select(products.c.id).where(
+                products.c.id.in_(sharded), products.c.is_active.is_(True)
+            )
+        ).all()
+        if len(active) != len(sharded):
+            return False
+
+    for product_id in sharded:
+        if not _take_from_shards(session, product_id, quantities[product_id]):
+            return False
+
+    _pending(session)["touched"].update(sharded)
+    refresh_aggregates(session, sharded, max_age=AGGREGATE_MAX_AGE)
+    return True
+
+
+def restore_stock(session, quantities: dict[int, int], sharded: Optional[set] = None):
+    if sharded is None:
+        sharded = sharded_products(session, quantities)
+
+    plain = [
+        {"pid": product_id, "qty": quantity}
+        for product_id, quantity in quantities.items()
+        if product_id not in sharded
+    ]
+    if plain:
+        session.execute(
+            products.update()
+            .where(products.c.id == bindparam("pid"))
+            .values(
+                stock=products.c.stock + bindparam("qty"),
+                version=products.c.version + 1,
+            ),
+            plain,
+        )
+
+    for product_id in sharded:
+        session.execute(
+            update(shards)
+            .where(
+                shards.c.product_id == product_id,
+                shards.c.shard == _pick_shard(session, product_id),
+            )
+            .values(stock=shards.c.stock + quantities[product_id])
+        )
+
+    _pending(session)["touched"].update(sharded)
+    refresh_aggregates(session, sharded, max_age=AGGREGATE_MAX_AGE)
+
+
+def find_short_product(session, quantities: dict[int, int]) -> Optional[str]:
+    shard_totals = (
+        select(shards.c.product_id, func.sum(shards.c.stock).label("stock"))
+        .where(shards.c.product_id.in_(list(quantities)))
+        .group_by(shards.c.product_id)
+        .subquery()
+    )
+    rows = session.execute(
+        select(
+            Product.id,
+            Product.name,
+            Product.is_active,
+            func.coalesce(shard_totals.c.stock, Product.stock).label("stock"),
+        )
+        .outerjoin(shard_totals, shard_totals.c.product_id == Product.id)
+        .where(Product.id.in_(list(quantities)))
+    ).all()
+
+    for row in rows:
+        if not row.is_active or (row.stock or 0) < quantities[row.id]:
+            return row.name
+    return None
+
+
+def set_stock(session, product_id: int, stock: int):
+    shard_count = session.scalar(select(Product.stock_shards).where(Product.id == product_id))
+    if shard_count:
+        _split_into_shards(session, product_id, stock, shard_count)
+    refresh_aggregates(session, [product_id])
+
+
+def enable_sharding(session, product_id: int, shard_count: int):
+    if shard_count < 1:
+        raise ValueError("Shardlar soni 1 dan kam bo'lishi mumkin emas")
+
+    stock = current_stock(session, product_id)
+    session.execute(
+        update(products)
+        .where(products.c.id == product_id)
+        .values(stock_shards=shard_count, version=products.c.version + 1)
+    )
+    _split_into_shards(session, product_id, stock, shard_count)
+    refresh_aggregates(session, [product_id])
+
+
+def disable_sharding(session, product_id: int):
+    stock = current_stock(session, product_id)
+    session.execute(delete(shards).where(shards.c.product_id == product_id))
+    session.execute(
+        update(products)
+        .where(products.c.id == product_id)
+        .values(stock=stock, stock_shards=0, version=products.c.version + 1)
+    )
+
+
+def current_stock(session, product_id: int) -> int:
+    shard_count, stock = session.execute(
+        select(Product.stock_shards, Product.stock).where(Product.id == product_id)
+    ).one()
+    if not shard_count:
+        return stock or 0
+
+    return session.scalar(
+        select(func.coalesce(func.sum(shards.c.stock), 0)).where(
+            shards.c.product_id == product_id
+        )
+    )
+
+
+def refresh_aggregates(session, product_ids: Optional[Iterable[int]] = None, max_age: float = 0):
+    now = time.monotonic()
+    statement = (
+        update(products)
+        .where(products.c.stock_shards > 0)
+        .values(
+            stock=select(func.coalesce(func.sum(shards.c.stock), 0))
+            .where(shards.c.product_id == products.c.id)
+            .scalar_subquery(),
+            version=products.c.version + 1,
+        )
+    )
+
+    if product_ids is not None:
+        with _refreshed_lock:
+            due = [
+                product_id
+                for product_id in product_ids
+                if now - _refreshed_at.get(product_id, float("-inf")) >= max_age
+            ]
+        if not due:
+            return
+        statement = statement.where(products.c.id.in_(due))
+    else:
+        due = ALL_PRODUCTS
+
+    session.execute(statement)
+
+    pending = _pending(session)
+    if due is ALL_PRODUCTS or pending["refreshed"] is ALL_PRODUCTS:
+        pending["refreshed"] = ALL_PRODUCTS
+    else:
+        pending["refreshed"].update(due)
+
+
+def stale_aggregates() -> set[int]:
+    with _refreshed_lock:
+        return set(_stale)
+
+
+class AggregateRefresher:
+
+    def __init__(self, interval: float = AGGREGATE_MAX_AGE):
+        self.interval = interval
+        self.refreshes = 0
+        self.failures = 0
+        self._session_factory = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self, session_factory):
+        if self._thread is not None:
+            return
+
+        self._session_factory = session_factory
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="stock-aggregate-refresh", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._session_factory is not None:
+            self.refresh_stale(self._session_factory)
+
+    def refresh_stale(self, session_factory) -> int:
+        product_ids = stale_aggregates()
+        if not product_ids:
+            return 0
+
+        session = session_factory()
+        try:
+            refresh_aggregates(session, product_ids)
+            session.commit()
+            self.refreshes += 1
+            return len(product_ids)
+        except Exception:
+            session.rollback()
+            self.failures += 1
+            return 0
+        finally:
+            session.close()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.refresh_stale(self._session_factory)
+
+
+aggregate_refresher = AggregateRefresher()
+
+
+def _pending(session) -> dict:
+    return session.info.setdefault(
+        "stock_aggregates", {"touched": set(), "refreshed": set()}
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _record_refreshes(session):
+    pending = session.info.pop("stock_aggregates", None)
+    if pending is None:
+        return
+
+    now = time.monotonic()
+    refreshed = pending["refreshed"]
+    with _refreshed_lock:
+        if refreshed is ALL_PRODUCTS:
+            _refreshed_at.clear()
+            _stale.clear()
+            return
+
+        _refreshed_at.update((product_id, now) for product_id in refreshed)
+        _stale.difference_update(refreshed)
+        _stale.update(pending["touched"] - refreshed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_refreshes(session):
+    session.info.pop("stock_aggregates", None)
+
+
+def _take_from_shards(session, product_id: int, quantity: int) -> bool:
+    start = _pick_shard(session, product_id)
+    taken = session.execute(
+        update(shards)
+        .where(
+            shards.c.product_id == product_id,
+            shards.c.shard == start,
+            shards.c.stock >= quantity,
+        )
+        .values(stock=shards.c.stock - quantity)
+    ).rowcount
+    if taken:
+        return True
+
+    remaining = quantity
+    available = session.execute(
+        select(shards.c.shard, shards.c.stock)
+        .where(shards.c.product_id == product_id, shards.c.stock > 0)
+        .order_by(shards.c.stock.desc())
+    ).all()
+
+    for shard, stock in available:
+        amount = min(stock, remaining)
+        taken = session.execute(
+            update(shards)
+            .where(
+                shards.c.product_id == product_id,
+                shards.c.shard == shard,
+                shards.c.stock >= amount,
+            )
+            .values(stock=shards.c.stock - amount)
+        ).rowcount
+        if taken:
+            remaining -= amount
+        if remaining == 0:
+            return True
+
+    return False
+
+
+def _pick_shard(session, product_id: int) -> int:
+    shard_count = session.scalar(select(Product.stock_shards).where(Product.id == product_id))
+    return random.randrange(shard_count or 1)
+
+
+def _split_into_shards(session, product_id: int, stock: int, shard_count: int):
+    session.execute(delete(shards).where(shards.c.product_id == product_id))
+
+    base, extra = divmod(max(stock, 0), shard_count)
+    session.execute(
+        insert(shards),
+        [
+            {
+                "product_id": product_id,
+                "shard": shard,
+                "stock": base + (1 if shard < extra else 0),
+            }
+            for shard in range(shard_count)
+        ],
+    )
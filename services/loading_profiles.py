@@ -0,0 +1,33 @@
+from sqlalchemy.orm import joinedload, selectinload
+
+from models import Cart, CartItem, Order, OrderItem
+
+
+LOADING_PROFILES = {
+    "cart_view": lambda: [
+        selectinload(Cart.items).joinedload(CartItem.product),
+    ],
+    "cart_items": lambda: [
+        joinedload(CartItem.product),
+    ],
+    "order_list": lambda: [
+        joinedload(Order.user),
+    ],
+    "order_detail": lambda: [
+        joinedload(Order.user),
+        selectinload(Order.items).joinedload(OrderItem.product),
+    ],
+}
+
+
+def get_loading_options(profile: str | None) -> list:
+    if profile is None:
+        return []
+
+    if profile not in LOADING_PROFILES:
+        raise ValueError(
+            f"Noma'lum loading profile: '{profile}'. "
+            f"Mumkin: {', '.join(LOADING_PROFILES)}"
+        )
+
+    return LOADING_PROFILES[profile]()
@@ -1,9 +1,59 @@
+from collections import defaultdict
 from datetime import datetime
 from typing import List, Optional
 
+from sqlalchemy import delete, func, insert, select, tuple_, update
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
 from models import Cart, CartItem, Order, OrderItem, Product, User
+from services.inventory import find_short_product, restore_stock, take_stock
+from services.loading_profiles import get_loading_options
+from services.product_cache import product_cache
+from services.report_service import ReportService, apply_order_rollup
+from utils.pagination import DEFAULT_PAGE_SIZE, decode_cursor, split_page
+from utils.read_routing import read_only
+from utils.retry import CONFLICT_MESSAGE, is_conflict, retry_on_conflict
+
+
+ORDER_STATUSES = ["pending", "completed", "cancelled"]
+BULK_CHUNK_SIZE = 5000
+SUMMARY_PRODUCTS = 3
+SUMMARY_MAX_LENGTH = 255
+
+
+def order_summary(product_names: List[str]) -> str:
+    summary = ", ".join(product_names[:SUMMARY_PRODUCTS])
+    if len(product_names) > SUMMARY_PRODUCTS:
+        summary += f" va yana {len(product_names) - SUMMARY_PRODUCTS} ta"
+    return summary[:SUMMARY_MAX_LENGTH]
+
+
+def _chunks(values: List[int], size: int = BULK_CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _require_target(order_ids, *filters):
+    if order_ids is None and not any(value is not None for value in filters):
+        raise ValueError("Order id'lari yoki filter berilishi kerak")
+
+
+def _require_status(status: str):
+    if status not in ORDER_STATUSES:
+        raise ValueError(f"Noto'g'ri status. Mumkin: {', '.join(ORDER_STATUSES)}")
+
+
+def _failed_outcomes(order_ids, found: dict, message: str) -> dict:
+    targets = order_ids if order_ids is not None else found
+    return {order_id: (False, message) for order_id in targets}
+
+
+def _conflict_outcomes(order_ids) -> dict:
+    if order_ids is None:
+        raise StaleDataError(CONFLICT_MESSAGE)
+    return _failed_outcomes(order_ids, {}, CONFLICT_MESSAGE)
 
 
 class OrderService:
@@ -18,40 +68,94 @@ class OrderService:
             if not user:
                 return False, "Foydalanuvchi topilmadi", None
 
-            cart = self.session.query(Cart).filter(Cart.user_id == user_id).first()
-            if not cart:
+            cart_id = self.session.scalar(
+                select(Cart.id).where(Cart.user_id == user_id)
+            )
+            if cart_id is None:
                 return False, "Savat topilmadi", None
 
-            if cart.is_empty():
+            lines = self.session.execute(
+                select(
+                    CartItem.product_id,
+                    func.sum(CartItem.quantity).label("quantity"),
+                    func.min(CartItem.id).label("first_item_id"),
+                    Product.name,
+                    Product.price,
+                    Product.sale,
+                    Product.category,
+                    Product.user_id,
+                    Product.stock_shards,
+                )
+                .join(Product, Product.id == CartItem.product_id)
+                .where(CartItem.cart_id == cart_id)
+                .group_by(
+                    CartItem.product_id,
+                    Product.name,
+                    Product.price,
+                    Product.sale,
+                    Product.category,
+                    Product.user_id,
+                    Product.stock_shards,
+                )
+                .order_by("first_item_id")
+            ).all()
+
+            if not lines:
                 return False, "Savat bo'sh. Mahsulot qo'shib oling", None
 
-            order = Order(user_id=user_id)
+            quantities = {line.product_id: line.quantity for line in lines}
+            sharded = {line.product_id for line in lines if line.stock_shards}
+
+            if not take_stock(self.session, quantities, sharded):
+                self.session.rollback()
+                product_cache.invalidate(quantities)
+                short_product = find_short_product(self.session, quantities)
+                return False, f"'{short_product}' uchun yetarli stock yok", None
+
+            order = Order(
+                user_id=user_id,
+                status="pending",
+                items_count=sum(quantities.values()),
+                summary=order_summary([line.name for line in lines]),
+            )
             self.session.add(order)
             self.session.flush()
 
-            for cart_item in cart.items:
-                product = cart_item.product
-
-                if not product.can_sell(cart_item.quantity):
-                    self.session.rollback()
-                    return False, f"'{product.name}' uchun yetarli stock yok", None
-
-                order_item = OrderItem(
-                    order_id=order.id,
-                    product_id=product.id,
-                    quantity=cart_item.quantity,
-                    price_at_purchase=product.price,
-                    sale_at_purchase=product.sale,
-                )
-                self.session.add(order_item)
-
-                product.stock -= cart_item.quantity
-
-            order.recalculate_total()
-
-            self.session.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
+            self.session.execute(
+                insert(OrderItem.__table__),
+                [
+                    {
+                        "order_id": order.id,
+                        "product_id": line.product_id,
+                        "quantity": line.quantity,
+                        "price_at_purchase": line.price,
+                        "sale_at_purchase": line.sale or 0,
+                        "category_at_purchase": line.category,
+                        "seller_id_at_purchase": line.user_id,
+                    }
+                    for line in lines
+                ],
+            )
+
+            self.session.execute(
+                update(Order.__table__)
+                .where(Order.__table__.c.id == order.id)
+                .values(total_price=self._order_total(order.id))
+            )
+
+            self.session.execute(
+                delete(CartItem.__table__).where(CartItem.__table__.c.cart_id == cart_id)
+            )
+            self.session.execute(
+                update(Cart.__table__)
+                .where(Cart.__table__.c.id == cart_id)
+                .values(items_count=0, total_price=0.0)
+            )
+
+            apply_order_rollup(self.session, [order.id], "pending")
 
             self.session.commit()
+            product_cache.invalidate(quantities)
 
             return True, f"Order #{order.id} muvaffaqiyatli yaratildi", order.id
 
@@ -59,25 +163,82 @@ class OrderService:
             self.session.rollback()
             return False, f"Order yaratishda xato: {str(e)}", None
 
-    def get_order_by_id(self, order_id: int) -> Optional[Order]:
-        return self.session.query(Order).filter(Order.id == order_id).first()
+    def _order_total(self, order_id: int):
+        return (
+            select(func.coalesce(func.sum(OrderItem.line_total), 0))
+            .where(OrderItem.order_id == order_id)
+            .scalar_subquery()
+        )
 
-    def get_user_orders(self, user_id: str) -> List[Order]:
+    def get_order_by_id(
+        self, order_id: int, profile: Optional[str] = "order_list"
+    ) -> Optional[Order]:
         return (
             self.session.query(Order)
+            .options(*get_loading_options(profile))
+            .filter(Order.id == order_id)
+            .first()
+        )
+
+    @read_only
+    def get_user_orders(
+        self, user_id: str, profile: Optional[str] = "order_list"
+    ) -> List[Order]:
+        return (
+            self.session.query(Order)
+            .options(*get_loading_options(profile))
             .filter(Order.user_id == user_id)
             .order_by(Order.created_at.desc())
             .all()
         )
 
-    def get_all_orders(self) -> List[Order]:
-        return self.session.query(Order).order_by(Order.created_at.desc()).all()
+    @read_only
+    def get_all_orders(self, profile: Optional[str] = "order_list") -> List[Order]:
+        return (
+            self.session.query(Order)
+            .options(*get_loading_options(profile))
+            .order_by(Order.created_at.desc())
+            .all()
+        )
 
-    def update_order_status(self, order_id: int, status: str) -> tuple[bool, str]:
-        valid_statuses = ["pending", "completed", "cancelled"]
+    @read_only
+    def get_user_orders_page(
+        self,
+        user_id: str,
+        cursor: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        profile: Optional[str] = "order_list",
+    ) -> tuple[List[Order], Optional[str]]:
+        query = self.session.query(Order).filter(Order.user_id == user_id)
+        return self._keyset_page(query, cursor, page_size, profile)
+
+    @read_only
+    def get_orders_page(
+        self,
+        cursor: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        profile: Optional[str] = "order_list",
+    ) -> tuple[List[Order], Optional[str]]:
+        query = self.session.query(Order)
+        return self._keyset_page(query, cursor, page_size, profile)
+
+    def _keyset_page(self, query, cursor, page_size, profile):
+        before = decode_cursor(cursor)
+        if before:
+            query = query.filter(tuple_(Order.created_at, Order.id) < tuple_(*before))
+
+        rows = (
+            query.options(*get_loading_options(profile))
+            .order_by(Order.created_at.desc(), Order.id.desc())
+            .limit(page_size + 1)
+            .all()
+        )
+        return split_page(rows, page_size, lambda order: (order.created_at, order.id))
 
-        if status not in valid_statuses:
-            return False, f"Noto'g'ri status. Mumkin: {', '.join(valid_statuses)}"
+    @retry_on_conflict((False, CONFLICT_MESSAGE))
+    def update_order_status(self, order_id: int, status: str) -> tuple[bool, str]:
+        if status not in ORDER_STATUSES:
+            return False, f"Noto'g'ri status. Mumkin: {', '.join(ORDER_STATUSES)}"
 
         try:
             order = self.get_order_by_id(order_id)
@@ -85,15 +246,22 @@ class OrderService:
                 return False, "Order topilmadi"
 
             old_status = order.status
+            if old_status != status:
+                apply_order_rollup(self.session, [order.id], old_status, -1)
+                apply_order_rollup(self.session, [order.id], status)
+
             order.status = status
             self.session.commit()
 
             return True, f"Status '{old_status}' dan '{status}' ga o'zgartirildi"
 
         except Exception as e:
+            if is_conflict(e):
+                raise
             self.session.rollback()
             return False, f"Xato: {str(e)}"
 
+    @retry_on_conflict((False, CONFLICT_MESSAGE))
     def cancel_order(self, order_id: int) -> tuple[bool, str]:
         try:
             order = self.get_order_by_id(order_id)
@@ -103,20 +271,199 @@ class OrderService:
             if order.status == "cancelled":
                 return False, "Bu order allaqachon bekor qilingan"
 
-            for order_item in order.items:
-                order_item.product.stock += order_item.quantity
-
+            old_status = order.status
             order.status = "cancelled"
+            self.session.flush()
+
+            restored = self.session.execute(
+                select(OrderItem.product_id, func.sum(OrderItem.quantity).label("quantity"))
+                .where(OrderItem.order_id == order.id)
+                .group_by(OrderItem.product_id)
+            ).all()
+            product_ids = [row.product_id for row in restored]
+            restore_stock(
+                self.session, {row.product_id: row.quantity for row in restored}
+            )
+
+            apply_order_rollup(self.session, [order.id], old_status, -1)
+            apply_order_rollup(self.session, [order.id], "cancelled")
+
             self.session.commit()
+            product_cache.invalidate(product_ids)
 
             return True, f"Order #{order.id} bekor qilindi va stock qaytarildi"
 
         except Exception as e:
+            if is_conflict(e):
+                raise
             self.session.rollback()
             return False, f"Xato: {str(e)}"
 
-    def get_order_details(self, order_id: int) -> dict:
-        order = self.get_order_by_id(order_id)
+    @retry_on_conflict(
+        lambda status, order_ids=None, *args, **kwargs: _conflict_outcomes(order_ids)
+    )
+    def bulk_update_status(
+        self,
+        status: str,
+        order_ids: Optional[List[int]] = None,
+        current_status: Optional[str] = None,
+        created_before: Optional[datetime] = None,
+        user_id: Optional[str] = None,
+    ) -> dict[int, tuple[bool, str]]:
+        _require_status(status)
+
+        if status == "cancelled":
+            return self._cancel_orders(order_ids, current_status, created_before, user_id)
+
+        _require_target(order_ids, current_status, created_before, user_id)
+        found = {}
+
+        try:
+            found = self._select_orders(order_ids, current_status, created_before, user_id)
+            outcomes = self._missing_outcomes(order_ids, found)
+
+            by_status = defaultdict(list)
+            for order_id, old_status in found.items():
+                if old_status == "cancelled":
+                    outcomes[order_id] = (False, "Bekor qilingan orderni o'zgartirib bo'lmaydi")
+                elif old_status == status:
+                    outcomes[order_id] = (True, f"Status allaqachon '{status}'")
+                else:
+                    by_status[old_status].append(order_id)
+
+            for old_status, ids in by_status.items():
+                apply_order_rollup(self.session, ids, old_status, -1)
+                self._set_status(ids, old_status, status)
+                for order_id in ids:
+                    outcomes[order_id] = (
+                        True,
+                        f"Status '{old_status}' dan '{status}' ga o'zgartirildi",
+                    )
+
+            changed = [order_id for ids in by_status.values() for order_id in ids]
+            apply_order_rollup(self.session, changed, status)
+
+            self.session.commit()
+            return outcomes
+
+        except Exception as e:
+            if is_conflict(e):
+                raise
+            self.session.rollback()
+            if order_ids is None and not found:
+                raise
+            return _failed_outcomes(order_ids, found, f"Xato: {str(e)}")
+
+    @retry_on_conflict(lambda order_ids=None, *args, **kwargs: _conflict_outcomes(order_ids))
+    def bulk_cancel_orders(
+        self,
+        order_ids: Optional[List[int]] = None,
+        current_status: Optional[str] = None,
+        created_before: Optional[datetime] = None,
+        user_id: Optional[str] = None,
+    ) -> dict[int, tuple[bool, str]]:
+        return self._cancel_orders(order_ids, current_status, created_before, user_id)
+
+    def _cancel_orders(
+        self, order_ids, current_status, created_before, user_id
+    ) -> dict[int, tuple[bool, str]]:
+        _require_target(order_ids, current_status, created_before, user_id)
+        found = {}
+
+        try:
+            found = self._select_orders(order_ids, current_status, created_before, user_id)
+            outcomes = self._missing_outcomes(order_ids, found)
+
+            by_status = defaultdict(list)
+            for order_id, old_status in found.items():
+                if old_status == "cancelled":
+                    outcomes[order_id] = (False, "Bu order allaqachon bekor qilingan")
+                else:
+                    by_status[old_status].append(order_id)
+
+            cancelled = [order_id for ids in by_status.values() for order_id in ids]
+            restored = {}
+
+            for chunk in _chunks(cancelled):
+                rows = self.session.execute(
+                    select(OrderItem.product_id, func.sum(OrderItem.quantity))
+                    .where(OrderItem.order_id.in_(chunk))
+                    .group_by(OrderItem.product_id)
+                ).all()
+                for product_id, quantity in rows:
+                    restored[product_id] = restored.get(product_id, 0) + quantity
+
+            for old_status, ids in by_status.items():
+                apply_order_rollup(self.session, ids, old_status, -1)
+                self._set_status(ids, old_status, "cancelled")
+
+            restore_stock(self.session, restored)
+            apply_order_rollup(self.session, cancelled, "cancelled")
+
+            self.session.commit()
+            product_cache.invalidate(restored)
+
+            for order_id in cancelled:
+                outcomes[order_id] = (True, f"Order #{order_id} bekor qilindi va stock qaytarildi")
+            return outcomes
+
+        except Exception as e:
+            if is_conflict(e):
+                raise
+            self.session.rollback()
+            if order_ids is None and not found:
+                raise
+            return _failed_outcomes(order_ids, found, f"Xato: {str(e)}")
+
+    def _select_orders(self, order_ids, current_status, created_before, user_id) -> dict:
+        filters = []
+        if current_status:
+            filters.append(Order.status == current_status)
+        if created_before:
+            filters.append(Order.created_at < created_before)
+        if user_id is not None:
+            filters.append(Order.user_id == user_id)
+
+        if order_ids is None:
+            return dict(self.session.execute(select(Order.id, Order.status).where(*filters)).all())
+
+        found = {}
+        for chunk in _chunks(order_ids):
+            found.update(
+                self.session.execute(
+                    select(Order.id, Order.status).where(Order.id.in_(chunk), *filters)
+                ).all()
+            )
+        return found
+
+    def _missing_outcomes(self, order_ids, found: dict) -> dict:
+        return {
+            order_id: (False, "Order topilmadi")
+            for order_id in order_ids or []
+            if order_id not in found
+        }
+
+    def _set_status(self, order_ids: List[int], old_status: str, status: str):
+        orders = Order.__table__
+        for chunk in _chunks(order_ids):
+            changed = self.session.execute(
+                update(orders)
+                .where(orders.c.id.in_(chunk), orders.c.status == old_status)
+                .values(
+                    status=status,
+                    version=orders.c.version + 1,
+                    updated_at=datetime.utcnow(),
+                )
+            ).rowcount
+            if changed != len(chunk):
+                raise StaleDataError(
+                    f"{len(chunk) - changed} ta order bir vaqtda o'zgartirilgan"
+                )
+
+    def get_order_details(
+        self, order_id: int, profile: Optional[str] = "order_detail"
+    ) -> dict:
+        order = self.get_order_by_id(order_id, profile=profile)
 
         if not order:
             return {}
@@ -140,7 +487,6 @@ class OrderService:
             ],
         }
 
+    @read_only
     def get_revenue(self, status: str = "completed") -> float:
-        orders = self.session.query(Order).filter(Order.status == status).all()
-
-        return sum(order.total_price for order in orders)
\ No newline at end of file
+        return ReportService(self.session).get_revenue(status)
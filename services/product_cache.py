@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from models import Product
+from services.inventory import current_stock
+
+
+@dataclass(frozen=True)
+class ProductSnapshot:
+    id: int
+    user_id: int
+    name: str
+    category: str
+    price: float
+    sale: int
+    stock: int
+    description: str
+    is_active: bool
+
+    @classmethod
+    def from_product(cls, product: Product, stock: Optional[int] = None) -> "ProductSnapshot":
+        return cls(
+            id=product.id,
+            user_id=product.user_id,
+            name=product.name,
+            category=product.category,
+            price=product.price,
+            sale=product.sale or 0,
+            stock=(product.stock if stock is None else stock) or 0,
+            description=product.description or "",
+            is_active=bool(product.is_active),
+        )
+
+    def get_final_price(self):
+        discount = (self.price * self.sale) / 100
+        return self.price - discount
+
+    def can_sell(self, quantity: int) -> bool:
+        return self.stock >= quantity
+
+
+class ProductCache:
+
+    def __init__(self, max_size: int = 4096, ttl: float = 30.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[int, tuple[float, ProductSnapshot]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, product_id: int) -> Optional[ProductSnapshot]:
+        with self._lock:
+            entry = self._entries.get(product_id)
+
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[product_id]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(product_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, snapshot: ProductSnapshot):
+        with self._lock:
+            self._entries[snapshot.id] = (time.monotonic() + self.ttl, snapshot)
+            self._entries.move_to_end(snapshot.id)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, product_ids: Iterable[int]):
+        with self._lock:
+            for product_id in product_ids:
+                if self._entries.pop(product_id, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+product_cache = ProductCache()
+
+
+def load_product(session: Session, product_id: int) -> Optional[ProductSnapshot]:
+    snapshot = product_cache.get(product_id)
+    if snapshot is not None:
+        return snapshot
+
+    product = session.query(Product).filter(Product.id == product_id).first()
+    if not product:
+        return None
+
+    snapshot = _snapshot(session, product)
+    product_cache.put(snapshot)
+    return snapshot
+
+
+def load_products(session: Session, product_ids: Iterable[int]) -> dict[int, ProductSnapshot]:
+    found = {}
+    missing = []
+
+    for product_id in set(product_ids):
+        snapshot = product_cache.get(product_id)
+        if snapshot is None:
+            missing.append(product_id)
+        else:
+            found[product_id] = snapshot
+
+    if missing:
+        for product in session.query(Product).filter(Product.id.in_(missing)):
+            snapshot = _snapshot(session, product)
+            product_cache.put(snapshot)
+            found[product.id] = snapshot
+
+    return found
+
+
+def _snapshot(session: Session, product: Product) -> ProductSnapshot:
+    if product.stock_shards:
+        return ProductSnapshot.from_product(product, current_stock(session, product.id))
+    return ProductSnapshot.from_product(product)
@@ -1,7 +1,52 @@
+import re
 from typing import Optional, List, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from models import Product
+from sqlalchemy import column, func, literal_column, or_, select, table, true, tuple_
+from models import Category, Product
+from services.cart_service import refresh_cart_totals
+from services.category_service import ensure_category, normalize_category
+from services.inventory import (
+    current_stock,
+    disable_sharding,
+    enable_sharding,
+    refresh_aggregates,
+    restore_stock,
+    set_stock,
+    take_stock,
+)
+from services.product_cache import ProductSnapshot, load_product, product_cache
+from utils.pagination import DEFAULT_PAGE_SIZE, decode_cursor, split_page
+from utils.read_routing import read_only
+from utils.retry import CONFLICT_MESSAGE, contention_stats, is_conflict, retry_on_conflict
+
+
+products_fts = table("products_fts", column("rowid"))
+
+
+def build_match_query(query_text: str) -> str:
+    tokens = re.findall(r"\w+", query_text or "")
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def validate_product_fields(
+    name: str, category: str, price: float, stock: int, sale: int = 0
+) -> Optional[str]:
+    if not name or len(name.strip()) < 3:
+        return "Mahsulot nomi kamida 3 ta belgidan iborat bo'lishi kerak"
+
+    if not category or len(category.strip()) < 2:
+        return "Kategoriya noto'g'ri"
+
+    if price <= 0:
+        return "Narx 0 dan katta bo'lishi kerak"
+
+    if stock < 0:
+        return "Stock manfiy bo'lishi mumkin emas"
+
+    if not 0 <= sale <= 100:
+        return "Chegirma 0 dan 100 gacha bo'lishi kerak"
+
+    return None
 
 
 class ProductService:
@@ -17,23 +62,17 @@ class ProductService:
         stock: int,
         description: str = "",
     ) -> Tuple[bool, str]:
-        if not name or len(name.strip()) < 3:
-            return False, "Mahsulot nomi kamida 3 ta belgidan iborat bo'lishi kerak"
-
-        if not category or len(category.strip()) < 2:
-            return False, "Kategoriya noto'g'ri"
-
-        if price <= 0:
-            return False, "Narx 0 dan katta bo'lishi kerak"
-
-        if stock < 0:
-            return False, "Stock manfiy bo'lishi mumkin emas"
+        error = validate_product_fields(name, category, price, stock)
+        if error:
+            return False, error
 
         try:
+            category_id, category = ensure_category(self.session, category)
             product = Product(
                 user_id=user_id,
                 name=name.strip(),
-                category=category.strip(),
+                category=category,
+                category_id=category_id,
                 price=price,
                 stock=stock,
                 description=description.strip(),
@@ -48,29 +87,64 @@ class ProductService:
             self.session.rollback()
             return False, f"Xato: {e}"
 
+    @read_only
     def get_user_products(self, user_id: str) -> List[Product]:
         return (
             self.session.query(Product)
-            .filter(Product.user_id == user_id, Product.is_active.is_(True))
+            .filter(Product.user_id == user_id, Product.is_active == true())
             .order_by(Product.name)
             .all()
         )
 
+    @read_only
     def get_all_products(self) -> List[Product]:
         return (
             self.session.query(Product)
-            .filter(Product.is_active.is_(True))
+            .filter(Product.is_active == true())
             .order_by(Product.name)
             .all()
         )
 
-    def get_product_by_id(self, product_id: int) -> Optional[Product]:
-        return (
-            self.session.query(Product)
-            .filter(Product.id == product_id, Product.is_active.is_(True))
-            .first()
+    @read_only
+    def get_products_page(
+        self, cursor: Optional[str] = None, page_size: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[Product], Optional[str]]:
+        query = self.session.query(Product).filter(Product.is_active == true())
+        return self._keyset_page(query, cursor, page_size)
+
+    @read_only
+    def get_user_products_page(
+        self,
+        user_id: str,
+        cursor: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> Tuple[List[Product], Optional[str]]:
+        query = self.session.query(Product).filter(
+            Product.user_id == user_id, Product.is_active == true()
         )
+        return self._keyset_page(query, cursor, page_size)
+
+    def _keyset_page(self, query, cursor, page_size):
+        after = decode_cursor(cursor)
+        if after:
+            query = query.filter(tuple_(Product.name, Product.id) > tuple_(*after))
+
+        rows = query.order_by(Product.name, Product.id).limit(page_size + 1).all()
+        return split_page(rows, page_size, lambda product: (product.name, product.id))
 
+    def get_product_by_id(self, product_id: int) -> Optional[ProductSnapshot]:
+        product = load_product(self.session, product_id)
+        if not product or not product.is_active:
+            return None
+        return product
+
+    def get_cache_stats(self) -> dict:
+        return product_cache.stats()
+
+    def get_contention_stats(self) -> dict:
+        return contention_stats.snapshot()
+
+    @retry_on_conflict((False, CONFLICT_MESSAGE))
     def update_product(
         self,
         product_id: int,
@@ -87,6 +161,7 @@ class ProductService:
                 return False, "Faqat o'z mahsulotingizni o'zgartira olasiz"
 
             allowed_fields = {"name", "category", "price", "stock", "description"}
+            sharded_stock = None
 
             for key, value in kwargs.items():
                 if key not in allowed_fields:
@@ -101,14 +176,35 @@ class ProductService:
                 if key == "stock" and value < 0:
                     return False, "Stock manfiy bo'lishi mumkin emas"
 
+                if key == "category":
+                    if len(normalize_category(value)) < 2:
+                        return False, "Kategoriya noto'g'ri"
+                    product.category_id, value = ensure_category(self.session, value)
+
+                if key == "stock" and product.stock_shards:
+                    sharded_stock = value
+                    continue
+
                 setattr(product, key, value)
 
+            if sharded_stock is not None:
+                self.session.flush()
+                set_stock(self.session, product_id, sharded_stock)
+
+            if "price" in kwargs:
+                self.session.flush()
+                refresh_cart_totals(self.session, product_ids=[product_id])
+
             self.session.commit()
+            product_cache.invalidate([product_id])
             return True, f"Mahsulot '{product.name}' yangilandi"
         except Exception as e:
+            if is_conflict(e):
+                raise
             self.session.rollback()
             return False, f"Xato: {e}"
 
+    @retry_on_conflict((False, CONFLICT_MESSAGE))
     def delete_product(self, product_id: int, user_id: str) -> Tuple[bool, str]:
         try:
             product = self.session.query(Product).filter(Product.id == product_id).first()
@@ -121,42 +217,91 @@ class ProductService:
 
             product.is_active = False
             self.session.commit()
+            product_cache.invalidate([product_id])
 
             return True, f"Mahsulot '{product.name}' o'chirildi"
         except Exception as e:
+            if is_conflict(e):
+                raise
             self.session.rollback()
             return False, f"Xato: {e}"
 
-    def search_products(self, query_text: str) -> List[Product]:
-        return (
-            self.session.query(Product)
-            .filter(
-                Product.is_active.is_(True),
-                or_(
-                    Product.name.ilike(f"%{query_text}%"),
-                    Product.description.ilike(f"%{query_text}%"),
-                ),
+    @read_only
+    def search_products(
+        self,
+        query_text: str,
+        ranked: bool = False,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[Product]:
+        match = build_match_query(query_text)
+
+        if not match:
+            query = (
+                self.session.query(Product)
+                .filter(
+                    Product.is_active == true(),
+                    or_(
+                        Product.name.ilike(f"%{query_text}%"),
+                        Product.description.ilike(f"%{query_text}%"),
+                    ),
+                )
+                .order_by(Product.name, Product.id)
+            )
+        else:
+            query = (
+                self.session.query(Product)
+                .join(products_fts, products_fts.c.rowid == Product.id)
+                .filter(
+                    literal_column("products_fts").op("MATCH")(match),
+                    Product.is_active == true(),
+                )
             )
-            .all()
-        )
 
+            if ranked:
+                query = query.order_by(
+                    func.bm25(literal_column("products_fts"), 10.0, 1.0), Product.id
+                )
+            else:
+                query = query.order_by(Product.name, Product.id)
+
+        if offset:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+
+        return query.all()
+
+    @read_only
     def get_products_by_category(self, category: str) -> List[Product]:
+        category_id = self.session.scalar(
+            select(Category.id).where(Category.name == normalize_category(category))
+        )
+        if category_id is None:
+            return []
+
         return (
             self.session.query(Product)
-            .filter(
-                Product.is_active.is_(True),
-                Product.category.ilike(category),
-            )
+            .filter(Product.category_id == category_id, Product.is_active == true())
+            .order_by(Product.name, Product.id)
             .all()
         )
 
+    @retry_on_conflict((False, CONFLICT_MESSAGE))
     def update_stock(self, product_id: int, quantity: int) -> Tuple[bool, str]:
         try:
-            product = self.get_product_by_id(product_id)
+            product = (
+                self.session.query(Product)
+                .filter(Product.id == product_id, Product.is_active == true())
+                .first()
+            )
 
             if not product:
                 return False, "Mahsulot topilmadi"
 
+            if product.stock_shards:
+                return self._update_sharded_stock(product_id, quantity)
+
             new_stock = product.stock + quantity
 
             if new_stock < 0:
@@ -164,8 +309,40 @@ class ProductService:
 
             product.stock = new_stock
             self.session.commit()
+            product_cache.invalidate([product_id])
 
             return True, f"Stock yangilandi: {new_stock}"
         except Exception as e:
+            if is_conflict(e):
+                raise
+            self.session.rollback()
+            return False, f"Xato: {e}"
+
+    def _update_sharded_stock(self, product_id: int, quantity: int) -> Tuple[bool, str]:
+        if quantity >= 0:
+            restore_stock(self.session, {product_id: quantity}, {product_id})
+        elif not take_stock(self.session, {product_id: -quantity}, {product_id}):
             self.session.rollback()
-            return False, f"Xato: {e}"
\ No newline at end of file
+            available = current_stock(self.session, product_id)
+            return False, f"Yetarli stock yo'q. Mavjud: {available}"
+
+        refresh_aggregates(self.session, [product_id])
+        new_stock = current_stock(self.session, product_id)
+        self.session.commit()
+        product_cache.invalidate([product_id])
+
+        return True, f"Stock yangilandi: {new_stock}"
+
+    def set_stock_sharding(self, product_id: int, shard_count: int) -> Tuple[bool, str]:
+        try:
+            if shard_count > 0:
+                enable_sharding(self.session, product_id, shard_count)
+            else:
+                disable_sharding(self.session, product_id)
+
+            self.session.commit()
+            product_cache.invalidate([product_id])
+            return True, f"Stock shardlari: {shard_count}"
+        except Exception as e:
+            self.session.rollback()
+            return False, f"Xato: {e}"
@@ -0,0 +1,220 @@
+from typing import Iterable, List, Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models import DailyOrderRollup, Order, OrderItem, SalesRollup
+from utils.read_routing import read_only
+
+
+ORDER_DAY = func.date(Order.created_at)
+
+
+def _sales_rows(order_ids: Optional[Iterable[int]] = None):
+    query = (
+        select(
+            ORDER_DAY.label("day"),
+            Order.status.label("status"),
+            OrderItem.category_at_purchase.label("category"),
+            OrderItem.seller_id_at_purchase.label("seller_id"),
+            func.sum(OrderItem.line_total).label("revenue"),
+            func.sum(OrderItem.quantity).label("units_sold"),
+            func.count(func.distinct(Order.id)).label("orders_count"),
+        )
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .group_by(
+            ORDER_DAY,
+            Order.status,
+            OrderItem.category_at_purchase,
+            OrderItem.seller_id_at_purchase,
+        )
+    )
+    if order_ids is not None:
+        query = query.where(Order.id.in_(list(order_ids)))
+    return query
+
+
+def _daily_rows(order_ids: Optional[Iterable[int]] = None):
+    query = select(
+        ORDER_DAY.label("day"),
+        Order.status.label("status"),
+        func.count(Order.id).label("orders_count"),
+        func.coalesce(func.sum(Order.total_price), 0).label("revenue"),
+    ).group_by(ORDER_DAY, Order.status)
+    if order_ids is not None:
+        query = query.where(Order.id.in_(list(order_ids)))
+    return query
+
+
+def _upsert(bind, model, keys, measures, rows):
+    if not rows:
+        return
+
+    statement = sqlite_insert(model.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=keys,
+        set_={
+            name: getattr(model.__table__.c, name) + getattr(statement.excluded, name)
+            for name in measures
+        },
+    )
+    bind.execute(statement, rows)
+
+
+def apply_order_rollup(bind, order_ids: Iterable[int], status: str, sign: int = 1):
+    order_ids = list(order_ids)
+    if not order_ids:
+        return
+
+    sales = [
+        {
+            "day": row.day,
+            "status": status,
+            "category": row.category,
+            "seller_id": row.seller_id,
+            "revenue": sign * (row.revenue or 0),
+            "units_sold": sign * (row.units_sold or 0),
+            "orders_count": sign * row.orders_count,
+        }
+        for row in bind.execute(_sales_rows(order_ids))
+    ]
+    daily = [
+        {
+            "day": row.day,
+            "status": status,
+            "orders_count": sign * row.orders_count,
+            "revenue": sign * (row.revenue or 0),
+        }
+        for row in bind.execute(_daily_rows(order_ids))
+    ]
+
+    _upsert(
+        bind,
+        SalesRollup,
+        ["day", "status", "category", "seller_id"],
+        ["revenue", "units_sold", "orders_count"],
+        sales,
+    )
+    _upsert(bind, DailyOrderRollup, ["day", "status"], ["orders_count", "revenue"], daily)
+
+
+def rebuild_rollups(bind):
+    bind.execute(delete(SalesRollup))
+    bind.execute(delete(DailyOrderRollup))
+
+    sales = _sales_rows().subquery()
+    bind.execute(
+        insert(SalesRollup).from_select(
+            ["day", "status", "category", "seller_id", "revenue", "units_sold", "orders_count"],
+            select(sales),
+        )
+    )
+    daily = _daily_rows().subquery()
+    bind.execute(
+        insert(DailyOrderRollup).from_select(
+            ["day", "status", "orders_count", "revenue"], select(daily)
+        )
+    )
+
+
+class ReportService:
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    @read_only
+    def get_revenue(self, status: str = "completed") -> float:
+        revenue = self.session.scalar(
+            select(func.coalesce(func.sum(DailyOrderRollup.revenue), 0)).where(
+                DailyOrderRollup.status == status
+            )
+        )
+        return float(revenue)
+
+    @read_only
+    def get_orders_count(self, status: str = "completed") -> int:
+        return self.session.scalar(
+            select(func.coalesce(func.sum(DailyOrderRollup.orders_count), 0)).where(
+                DailyOrderRollup.status == status
+            )
+        )
+
+    @read_only
+    def revenue_by_day(
+        self,
+        status: str = "completed",
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> List[dict]:
+        query = (
+            select(
+                DailyOrderRollup.day,
+                DailyOrderRollup.orders_count,
+                DailyOrderRollup.revenue,
+                func.coalesce(func.sum(SalesRollup.units_sold), 0).label("units_sold"),
+            )
+            .outerjoin(
+                SalesRollup,
+                (SalesRollup.day == DailyOrderRollup.day)
+                & (SalesRollup.status == DailyOrderRollup.status),
+            )
+            .where(DailyOrderRollup.status == status)
+            .group_by(
+                DailyOrderRollup.day,
+                DailyOrderRollup.orders_count,
+                DailyOrderRollup.revenue,
+            )
+            .order_by(DailyOrderRollup.day)
+        )
+        query = self._date_range(query, DailyOrderRollup.day, start, end)
+        return [dict(row._mapping) for row in self.session.execute(query)]
+
+    @read_only
+    def revenue_by_category(
+        self,
+        status: str = "completed",
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> List[dict]:
+        return self._sales_breakdown(SalesRollup.category, status, start, end)
+
+    @read_only
+    def revenue_by_seller(
+        self,
+        status: str = "completed",
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> List[dict]:
+        return self._sales_breakdown(SalesRollup.seller_id, status, start, end)
+
+    def rebuild(self) -> tuple[bool, str]:
+        try:
+            rebuild_rollups(self.session)
+            self.session.commit()
+            return True, "Hisobotlar qayta hisoblandi"
+        except Exception as e:
+            self.session.rollback()
+            return False, f"Xato: {str(e)}"
+
+    def _sales_breakdown(self, dimension, status, start, end) -> List[dict]:
+        query = (
+            select(
+                dimension,
+                func.sum(SalesRollup.revenue).label("revenue"),
+                func.sum(SalesRollup.units_sold).label("units_sold"),
+                func.sum(SalesRollup.orders_count).label("orders_count"),
+            )
+            .where(SalesRollup.status == status, SalesRollup.orders_count != 0)
+            .group_by(dimension)
+            .order_by(func.sum(SalesRollup.revenue).desc())
+        )
+        query = self._date_range(query, SalesRollup.day, start, end)
+        return [dict(row._mapping) for row in self.session.execute(query)]
+
+    def _date_range(self, query, day_column, start, end):
+        if start:
+            query = query.where(day_column >= start)
+        if end:
+            query = query.where(day_column <= end)
+        return query
@@ -68,6 +68,7 @@ class UserService:
             if not verify_password(password, user.password):
                 return False, "Parol noto'g'ri"
 
+            self.session.expunge(user)
             self.logged_user = user
             return True, f"Xush kelibsiz, {user.username}"
 
@@ -0,0 +1,46 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault(
+    "ECOMMERCE_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'ecommerce.db')}",
+)
+os.environ.pop("ECOMMERCE_READ_REPLICA_URL", None)
+
+
+def upgrade(engine):
+    import models
+    from database import Base
+    from migrations import run_migrations
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'ecommerce.db'}"
+
+
+@pytest.fixture
+def engine(database_url):
+    from database import create_configured_engine
+
+    engine = create_configured_engine(database_url)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    from sqlalchemy.orm import Session
+
+    upgrade(engine)
+    with Session(bind=engine) as session:
+        yield session
@@ -0,0 +1,79 @@
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from benchmarks.seed import seed_database
+from database import create_configured_async_engine
+from models import Order
+from services.async_services import AsyncOrderService
+from services.order_service import OrderService
+
+
+def run_async(database_url, work):
+    async def main():
+        engine = create_configured_async_engine(database_url)
+        try:
+            async with async_sessionmaker(bind=engine, expire_on_commit=False)() as session:
+                return await work(session)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+def first_order(engine, status=None):
+    statement = select(Order.id, Order.user_id).order_by(Order.id)
+    if status:
+        statement = statement.where(Order.status == status)
+    with Session(bind=engine) as session:
+        return session.execute(statement.limit(1)).one()
+
+
+def test_async_orders_are_usable_after_await(engine, database_url):
+    seed_database(database_url, users=5, products=20, orders=10)
+    order_id, user_id = first_order(engine)
+
+    async def work(session):
+        service = AsyncOrderService(session)
+        orders = await service.get_user_orders(user_id)
+        page, _ = await service.get_orders_page()
+        order = await service.get_order_by_id(order_id)
+        return [repr(item) for item in orders + page + [order]]
+
+    reprs = run_async(database_url, work)
+
+    assert reprs
+    assert all(item.startswith("<Order(") for item in reprs)
+
+
+def test_async_bulk_cancel_retries_without_blocking(engine, database_url, monkeypatch):
+    seed_database(database_url, users=5, products=20, orders=10)
+    order_id, _ = first_order(engine, "pending")
+
+    cancel_orders = OrderService._cancel_orders
+    conflicts = []
+
+    def flaky_cancel(self, *args):
+        if not conflicts:
+            conflicts.append(args)
+            raise StaleDataError("conflict")
+        return cancel_orders(self, *args)
+
+    def blocking_sleep(seconds):
+        raise AssertionError("sync sleep inside the event loop")
+
+    monkeypatch.setattr(OrderService, "_cancel_orders", flaky_cancel)
+    monkeypatch.setattr("utils.retry.time.sleep", blocking_sleep)
+
+    async def work(session):
+        return await AsyncOrderService(session).bulk_update_status(
+            "cancelled", order_ids=[order_id]
+        )
+
+    outcomes = run_async(database_url, work)
+
+    assert conflicts
+    assert outcomes[order_id][0]
@@ -0,0 +1,50 @@
+from sqlalchemy.orm import Session
+
+from benchmarks.seed import seed_database
+from services.catalog_service import CatalogQuery, CatalogService, analyze_plan
+
+
+def test_plan_regressions_on_empty_catalog(session):
+    assert CatalogService(session).plan_regressions() == []
+
+
+def test_plan_regressions_on_seeded_catalog(engine, database_url):
+    seed_database(database_url, users=50, products=2_000, orders=200)
+
+    with Session(bind=engine) as session:
+        assert CatalogService(session).plan_regressions() == []
+
+
+def test_category_filter_uses_index_search(engine, database_url):
+    seed_database(database_url, users=50, products=2_000, orders=200)
+
+    with Session(bind=engine) as session:
+        report = CatalogService(session).explain(CatalogQuery(category="Books", sort="price"))
+
+    assert not report["full_scan"]
+    assert not report["unbounded_index_scan"]
+
+
+def test_analyze_plan_flags_scans():
+    full = analyze_plan(["SCAN products"])
+    assert full["full_scan"]
+
+    unbounded = analyze_plan(
+        ["SCAN products USING INDEX ix_products_active_name"], search_expected=True
+    )
+    assert not unbounded["full_scan"]
+    assert unbounded["unbounded_index_scan"]
+
+    ordered = analyze_plan(
+        ["SCAN products USING INDEX ix_products_active_name"], search_expected=False
+    )
+    assert not ordered["unbounded_index_scan"]
+
+    rowid_walk = analyze_plan(["SCAN products"], rowid_order=True)
+    assert not rowid_walk["full_scan"]
+
+    sorted_walk = analyze_plan(
+        ["SCAN products", "USE TEMP B-TREE FOR ORDER BY"], rowid_order=True
+    )
+    assert sorted_walk["full_scan"]
+    assert sorted_walk["temp_sort"]
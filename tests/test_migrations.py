@@ -0,0 +1,126 @@
+import sqlite3
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from conftest import upgrade
+
+
+BASELINE_SCHEMA = """
+CREATE TABLE users (
+    id INTEGER NOT NULL,
+    username VARCHAR NOT NULL,
+    password VARCHAR NOT NULL,
+    first_name VARCHAR,
+    last_name VARCHAR,
+    PRIMARY KEY (id),
+    UNIQUE (username)
+);
+CREATE TABLE carts (
+    id INTEGER NOT NULL,
+    user_id VARCHAR NOT NULL,
+    created_at DATETIME,
+    updated_at DATETIME,
+    PRIMARY KEY (id),
+    UNIQUE (user_id),
+    FOREIGN KEY(user_id) REFERENCES users (id)
+);
+CREATE TABLE orders (
+    id INTEGER NOT NULL,
+    user_id VARCHAR NOT NULL,
+    total_price FLOAT,
+    status VARCHAR(20),
+    created_at DATETIME,
+    updated_at DATETIME,
+    PRIMARY KEY (id),
+    FOREIGN KEY(user_id) REFERENCES users (id)
+);
+CREATE TABLE products (
+    id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    name VARCHAR NOT NULL,
+    category VARCHAR NOT NULL,
+    price FLOAT NOT NULL,
+    stock INTEGER,
+    description VARCHAR,
+    is_active BOOLEAN,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    updated_at DATETIME,
+    PRIMARY KEY (id),
+    FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+CREATE TABLE cart_items (
+    id INTEGER NOT NULL,
+    cart_id INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    created_at DATETIME,
+    PRIMARY KEY (id),
+    FOREIGN KEY(cart_id) REFERENCES carts (id),
+    FOREIGN KEY(product_id) REFERENCES products (id)
+);
+CREATE TABLE order_items (
+    id INTEGER NOT NULL,
+    order_id INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    price_at_purchase FLOAT NOT NULL,
+    sale_at_purchase INTEGER,
+    created_at DATETIME,
+    PRIMARY KEY (id),
+    FOREIGN KEY(order_id) REFERENCES orders (id),
+    FOREIGN KEY(product_id) REFERENCES products (id)
+);
+INSERT INTO users VALUES (1, 'alice', 'x', 'Alice', 'Smith');
+INSERT INTO carts VALUES (1, 1, '2024-01-01 10:00:00', NULL);
+INSERT INTO products VALUES
+    (1, 1, 'Hammer', ' Hand  Tools ', 10.0, 5, '', 1, '2024-01-01 10:00:00', NULL);
+INSERT INTO cart_items VALUES (1, 1, 1, 2, '2024-01-01 10:00:00');
+INSERT INTO orders VALUES (1, 1, 20.0, 'pending', '2024-01-02 10:00:00', NULL);
+INSERT INTO order_items VALUES (1, 1, 1, 2, 10.0, 0, '2024-01-02 10:00:00');
+"""
+
+
+def test_upgrade_baseline_database_with_orders(engine, database_url):
+    from migrations import SCHEMA_VERSION, read_schema_version
+    from services.cart_service import CartService
+    from services.order_service import OrderService
+    from services.product_service import ProductService
+    from services.report_service import ReportService
+
+    connection = sqlite3.connect(database_url.removeprefix("sqlite:///"))
+    connection.executescript(BASELINE_SCHEMA)
+    connection.close()
+
+    upgrade(engine)
+
+    assert read_schema_version(engine) == SCHEMA_VERSION
+    with Session(bind=engine) as session:
+        snapshot = session.execute(
+            text("SELECT category_at_purchase, seller_id_at_purchase FROM order_items")
+        ).one()
+        assert tuple(snapshot) == ("Hand Tools", 1)
+
+        reports = ReportService(session)
+        assert reports.get_revenue("pending") == 20.0
+        assert [row["category"] for row in reports.revenue_by_category("pending")] == [
+            "Hand Tools"
+        ]
+
+        products = ProductService(session).get_products_by_category("hand tools")
+        assert [product.name for product in products] == ["Hammer"]
+
+        assert CartService(session).get_cart_totals(1) == {
+            "items_count": 2,
+            "total_price": 20.0,
+        }
+        assert OrderService(session).get_order_by_id(1).items_count == 2
+
+
+def test_upgrade_is_a_no_op_on_current_schema(engine):
+    from migrations import SCHEMA_VERSION, read_schema_version
+
+    upgrade(engine)
+    upgrade(engine)
+
+    assert read_schema_version(engine) == SCHEMA_VERSION
@@ -0,0 +1,54 @@
+import base64
+import json
+from datetime import datetime
+from typing import Callable, Iterator, Optional
+
+
+DEFAULT_PAGE_SIZE = 20
+
+
+def encode_cursor(*values) -> str:
+    payload = [
+        {"dt": value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[list]:
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Noto'g'ri cursor: {cursor}") from e
+
+    if not isinstance(payload, list):
+        raise ValueError(f"Noto'g'ri cursor: {cursor}")
+
+    return [
+        datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value
+        for value in payload
+    ]
+
+
+def split_page(rows: list, page_size: int, key) -> tuple[list, Optional[str]]:
+    if len(rows) <= page_size:
+        return rows, None
+
+    rows = rows[:page_size]
+    return rows, encode_cursor(*key(rows[-1]))
+
+
+def iter_pages(fetch_page: Callable[[Optional[str]], tuple]) -> Iterator:
+    cursor = None
+
+    while True:
+        rows, cursor = fetch_page(cursor)
+        yield from rows
+
+        if not cursor:
+            return
@@ -0,0 +1,50 @@
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+
+READ_YOUR_WRITES = "read_your_writes"
+EVENTUAL = "eventual"
+CONSISTENCY_LEVELS = (READ_YOUR_WRITES, EVENTUAL)
+
+_read_route = ContextVar("read_route", default=None)
+_default_consistency = ContextVar("default_consistency", default=READ_YOUR_WRITES)
+
+
+def current_read_route() -> Optional[str]:
+    return _read_route.get()
+
+
+def _validate(level: str) -> str:
+    if level not in CONSISTENCY_LEVELS:
+        raise ValueError(
+            f"Noma'lum izchillik darajasi: '{level}'. "
+            f"Mumkin: {', '.join(CONSISTENCY_LEVELS)}"
+        )
+    return level
+
+
+@contextmanager
+def consistency(level: str):
+    token = _default_consistency.set(_validate(level))
+    try:
+        yield
+    finally:
+        _default_consistency.reset(token)
+
+
+def read_only(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, consistency: Optional[str] = None, **kwargs):
+        if _read_route.get() is not None and consistency is None:
+            return method(self, *args, **kwargs)
+
+        level = _validate(consistency or _default_consistency.get())
+        token = _read_route.set(level)
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            _read_route.reset(token)
+
+    return wrapper
@@ -0,0 +1,113 @@
+import asyncio
+import functools
+import random
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm.exc import StaleDataError
+
+
+CONFLICT_MESSAGE = "Ma'lumot bir vaqtda o'zgartirildi, qayta urinib ko'ring"
+
+
+def is_conflict(error: Exception) -> bool:
+    if isinstance(error, StaleDataError):
+        return True
+    return isinstance(error, OperationalError) and "locked" in str(error.orig).lower()
+
+
+def backoff_delay(backoff: float, conflicts: int) -> float:
+    return backoff * (2 ** (conflicts - 1)) * random.uniform(0.5, 1.5)
+
+
+def _give_up(failure, args, kwargs):
+    if callable(failure):
+        return failure(*args, **kwargs)
+    return failure
+
+
+class ContentionStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations = defaultdict(
+            lambda: {"calls": 0, "conflicts": 0, "retries": 0, "failures": 0}
+        )
+
+    def record(self, operation: str, conflicts: int, failed: bool):
+        with self._lock:
+            stats = self._operations[operation]
+            stats["calls"] += 1
+            stats["conflicts"] += conflicts
+            stats["retries"] += conflicts - (1 if failed else 0)
+            stats["failures"] += int(failed)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {operation: dict(stats) for operation, stats in self._operations.items()}
+
+    def reset(self):
+        with self._lock:
+            self._operations.clear()
+
+
+contention_stats = ContentionStats()
+
+
+def retry_on_conflict(failure, attempts: int = 4, backoff: float = 0.005):
+    def decorator(method):
+        operation = method.__qualname__
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            conflicts = 0
+
+            while True:
+                try:
+                    result = method(self, *args, **kwargs)
+                except Exception as e:
+                    if not is_conflict(e):
+                        raise
+                    self.session.rollback()
+                    conflicts += 1
+
+                    if conflicts >= attempts:
+                        contention_stats.record(operation, conflicts, failed=True)
+                        return _give_up(failure, args, kwargs)
+
+                    time.sleep(backoff_delay(backoff, conflicts))
+                    continue
+
+                contention_stats.record(operation, conflicts, failed=False)
+                return result
+
+        wrapper.conflict_policy = (operation, failure, attempts, backoff)
+        return wrapper
+
+    return decorator
+
+
+async def retry_async(policy, call, rollback, *args, **kwargs):
+    operation, failure, attempts, backoff = policy
+    conflicts = 0
+
+    while True:
+        try:
+            result = await call(*args, **kwargs)
+        except Exception as e:
+            if not is_conflict(e):
+                raise
+            await rollback()
+            conflicts += 1
+
+            if conflicts >= attempts:
+                contention_stats.record(operation, conflicts, failed=True)
+                return _give_up(failure, args, kwargs)
+
+            await asyncio.sleep(backoff_delay(backoff, conflicts))
+            continue
+
+        contention_stats.record(operation, conflicts, failed=False)
+        return result
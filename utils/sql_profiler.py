@@ -0,0 +1,168 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+
+LATENCY_BUCKETS_MS = (1, 5, 10, 50, 100, 500, float("inf"))
+UNATTRIBUTED = "<unattributed>"
+
+
+def _empty_stats() -> dict:
+    return {
+        "calls": 0,
+        "statements": 0,
+        "total_ms": 0.0,
+        "histogram": [0] * len(LATENCY_BUCKETS_MS),
+    }
+
+
+class QueryProfiler:
+
+    def __init__(self, n_plus_one_threshold: int = 5):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.methods = defaultdict(_empty_stats)
+        self.suspects = {}
+        self._current = ContextVar("profiled_call", default=None)
+        self._lock = threading.Lock()
+        self._engines = []
+
+    def attach(self, engine):
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+        self._engines.append(engine)
+
+    def detach(self):
+        for engine in self._engines:
+            event.remove(engine, "before_cursor_execute", self._before_execute)
+            event.remove(engine, "after_cursor_execute", self._after_execute)
+            event.remove(engine, "handle_error", self._handle_error)
+        self._engines.clear()
+
+    def instrument(self, service):
+        owner = type(service).__name__
+
+        for name in dir(type(service)):
+            if name.startswith("_"):
+                continue
+            method = getattr(service, name)
+            if callable(method):
+                setattr(service, name, self._wrap(f"{owner}.{name}", method))
+
+        return service
+
+    def _wrap(self, label: str, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            if self._current.get() is not None:
+                return method(*args, **kwargs)
+
+            call = {"label": label, "statements": Counter()}
+            token = self._current.set(call)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._current.reset(token)
+                self._finish_call(call)
+
+        return wrapper
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("profiler_started", []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["profiler_started"].pop()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        call = self._current.get()
+        label = call["label"] if call else UNATTRIBUTED
+        if call:
+            call["statements"][statement] += 1
+
+        bucket = next(
+            index for index, bound in enumerate(LATENCY_BUCKETS_MS) if elapsed_ms <= bound
+        )
+        with self._lock:
+            stats = self.methods[label]
+            stats["statements"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["histogram"][bucket] += 1
+
+    def _handle_error(self, exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("profiler_started"):
+            connection.info["profiler_started"].pop()
+
+    def _finish_call(self, call: dict):
+        with self._lock:
+            self.methods[call["label"]]["calls"] += 1
+
+            for statement, count in call["statements"].items():
+                if count < self.n_plus_one_threshold:
+                    continue
+                key = (call["label"], statement)
+                self.suspects[key] = max(self.suspects.get(key, 0), count)
+
+    def report(self) -> dict:
+        with self._lock:
+            methods = {}
+            for label, stats in sorted(
+                self.methods.items(), key=lambda item: item[1]["total_ms"], reverse=True
+            ):
+                calls = stats["calls"] or 1
+                methods[label] = {
+                    "calls": stats["calls"],
+                    "statements": stats["statements"],
+                    "statements_per_call": round(stats["statements"] / calls, 2),
+                    "total_ms": round(stats["total_ms"], 3),
+                    "histogram_ms": {
+                        f"<={bound:g}": count
+                        for bound, count in zip(LATENCY_BUCKETS_MS, stats["histogram"])
+                    },
+                }
+
+            suspects = [
+                {"method": label, "repeats": count, "statement": statement}
+                for (label, statement), count in sorted(
+                    self.suspects.items(), key=lambda item: item[1], reverse=True
+                )
+            ]
+
+        return {"methods": methods, "n_plus_one_suspects": suspects}
+
+    def format_report(self) -> str:
+        report = self.report()
+        lines = ["SQL profil:"]
+
+        for label, stats in report["methods"].items():
+            lines.append(
+                f"  {label}: {stats['calls']} chaqiruv, {stats['statements']} so'rov "
+                f"({stats['statements_per_call']}/chaqiruv), {stats['total_ms']:.1f} ms"
+            )
+
+        if report["n_plus_one_suspects"]:
+            lines.append("N+1 gumonlari:")
+            for suspect in report["n_plus_one_suspects"]:
+                statement = " ".join(suspect["statement"].split())[:120]
+                lines.append(f"  {suspect['method']} x{suspect['repeats']}: {statement}")
+
+        return "\n".join(lines)
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as output:
+            json.dump(self.report(), output, indent=2)
+
+
+def profiler_from_env() -> Optional[QueryProfiler]:
+    if os.environ.get("ECOMMERCE_SQL_PROFILE", "").lower() not in ("1", "true", "yes"):
+        return None
+
+    threshold = int(os.environ.get("ECOMMERCE_SQL_PROFILE_N1_THRESHOLD", "5"))
+    return QueryProfiler(n_plus_one_threshold=threshold)